@@ -0,0 +1,278 @@
+"""
+Conversão em lote pela linha de comando, sem interface gráfica.
+
+Exemplo:
+    python batch.py --de ofx --para csv extratos/ "entrada/**/*.ofx" --saida convertidos/
+    python batch.py --de ofx --para csv,pdf,xml extratos/   # uma leitura, três saídas
+
+Os arquivos são distribuídos entre processos (um por núcleo, por padrão), cada
+resultado é gravado direto no disco e, ao final, um resumo em JSON com os
+números de desempenho é impresso na saída padrão. Este módulo não importa o
+customtkinter, então pode rodar em servidores sem ambiente gráfico.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from converter import Converter
+from instrumentation import Instrumentation
+from xml_stream import XmlMapping
+from conversions import plan_route
+from raster import page_output_path
+
+# Extensões procuradas quando a entrada é um diretório
+EXTENSIONS = {
+    'ofx': ('.ofx',),
+    'csv': ('.csv',),
+    'pdf': ('.pdf',),
+    'jpg': ('.jpg', '.jpeg'),
+    'xml': ('.xml',),
+}
+
+_converter = None
+
+
+def _init_worker():
+    global _converter
+    _converter = Converter()
+    # O lote já ocupa todos os núcleos: cada arquivo é rasterizado num processo só
+    _converter.render_workers = 1
+
+
+def find_inputs(patterns, from_format):
+    """Expande diretórios e globs em uma lista ordenada de arquivos, sem repetições."""
+    extensions = EXTENSIONS.get(from_format, (f".{from_format}",))
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                found.extend(os.path.join(root, name) for name in files if name.lower().endswith(extensions))
+        else:
+            found.extend(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(set(os.path.abspath(path) for path in found))
+
+
+def output_path_for(input_path, to_format, output_dir=None):
+    base_dir = output_dir or os.path.dirname(input_path)
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(base_dir, f"{base_name}.{to_format}")
+
+
+def _is_same_file(input_path, output_path):
+    """A saída apontaria para a própria entrada (mesmo caminho, link ou nome com outra caixa)?"""
+    try:
+        return os.path.samefile(input_path, output_path)
+    except OSError:
+        return os.path.normcase(os.path.realpath(input_path)) == os.path.normcase(os.path.realpath(output_path))
+
+
+def is_up_to_date(input_path, output_path, to_format):
+    """Um resultado está em dia se existe e é mais novo que a entrada."""
+    # Listas de páginas (pdf_to_jpg) são gravadas como <nome>_pagina_N.jpg
+    check_path = page_output_path(output_path, 1) if to_format == 'jpg' else output_path
+    try:
+        return os.path.getmtime(check_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def _temp_path(path):
+    return f"{path}.tmp{os.getpid()}"
+
+
+def _convert_one(from_format, input_path, outputs, options, measure=False):
+    """
+    Executado dentro de um processo do pool. Todas as saídas saem de uma
+    única leitura da entrada; cada arquivo é gravado com outro nome e só
+    renomeado no fim, para nunca deixar um resultado pela metade (as páginas
+    JPG são gravadas uma a uma, com o nome final).
+    """
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': _describe_outputs(outputs), 'bytes_in': os.path.getsize(input_path)}
+    _converter.instrumentation = Instrumentation() if measure else None
+    try:
+        temp_outputs = {fmt: path if fmt == 'jpg' else _temp_path(path) for fmt, path in outputs.items()}
+        written = _converter.convert_many(input_path, from_format, temp_outputs, **options)
+        paths = []
+        for fmt, fmt_paths in written.items():
+            if fmt != 'jpg':
+                os.replace(temp_outputs[fmt], outputs[fmt])
+                fmt_paths = [outputs[fmt]]
+            paths.extend(fmt_paths)
+        result['files_out'], result['bytes_out'] = len(paths), sum(os.path.getsize(path) for path in paths)
+        result['status'] = 'converted'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    if measure:
+        result['stages'] = _converter.instrumentation.to_dict()
+    return result
+
+
+def _describe_outputs(outputs):
+    """O caminho de saída, ou {formato: caminho} quando há várias saídas."""
+    return next(iter(outputs.values())) if len(outputs) == 1 else dict(outputs)
+
+
+def run_batch(inputs, from_format, to_formats, output_dir=None, workers=None, force=False, log=None, options=None, measure=False):
+    """
+    Converte `inputs` em paralelo e devolve o resumo da execução.
+    `to_formats` é um formato ou uma lista deles, gerados todos a partir de
+    uma única leitura de cada arquivo. `options` são repassadas ao
+    Converter (ex.: dpi do PDF para JPG). Com `measure`, cada resultado
+    traz as medições por etapa (instrumentation.py).
+    """
+    to_formats = [to_formats] if isinstance(to_formats, str) else list(to_formats)
+    for to_format in to_formats:
+        # Falha antes de iniciar os processos se alguma rota não existir
+        plan_route(from_format, to_format)
+    conversion_name = f"{from_format}_to_{'+'.join(to_formats)}"
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = []
+    pending = []
+    planned = [(input_path, {to_format: output_path_for(input_path, to_format, output_dir) for to_format in to_formats})
+               for input_path in inputs]
+    # Entradas com o mesmo nome em pastas diferentes (ex.: 2023/jan.ofx e 2024/jan.ofx com --saida)
+    # iriam para o mesmo arquivo: nenhuma delas é convertida
+    claims = {}
+    for input_path, outputs in planned:
+        for path in outputs.values():
+            claims.setdefault(os.path.normcase(os.path.abspath(path)), []).append(input_path)
+    for input_path, outputs in planned:
+        clashes = sorted({other for path in outputs.values() for other in claims[os.path.normcase(os.path.abspath(path))]
+                          if other != input_path})
+        if any(_is_same_file(input_path, path) for path in outputs.values()):
+            # Nunca grava por cima da entrada, nem com --forcar
+            results.append({'input': input_path, 'output': _describe_outputs(outputs), 'status': 'error',
+                            'error': "A saída seria gravada sobre o próprio arquivo de entrada."})
+        elif clashes:
+            results.append({'input': input_path, 'output': _describe_outputs(outputs), 'status': 'error',
+                            'error': f"A saída seria a mesma de {', '.join(clashes)}; converta esses arquivos para pastas de saída diferentes."})
+        elif not force and all(is_up_to_date(input_path, path, fmt) for fmt, path in outputs.items()):
+            results.append({'input': input_path, 'output': _describe_outputs(outputs), 'status': 'skipped'})
+        else:
+            pending.append((input_path, outputs))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker) as pool:
+            futures = [pool.submit(_convert_one, from_format, input_path, outputs, options or {}, measure) for input_path, outputs in pending]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if log:
+                    log(f"[{done}/{len(pending)}] {result['status']}: {result['input']}")
+
+    elapsed = time.perf_counter() - start
+    converted = [r for r in results if r['status'] == 'converted']
+    bytes_in = sum(r['bytes_in'] for r in converted)
+    return {
+        'conversion': conversion_name,
+        'workers': workers,
+        'files': len(results),
+        'converted': len(converted),
+        'skipped': sum(r['status'] == 'skipped' for r in results),
+        'errors': sum(r['status'] == 'error' for r in results),
+        'seconds': round(elapsed, 4),
+        'files_per_second': round(len(converted) / elapsed, 2) if elapsed else 0.0,
+        'mb_in': round(bytes_in / (1024 * 1024), 3),
+        'mb_in_per_second': round(bytes_in / (1024 * 1024) / elapsed, 3) if elapsed else 0.0,
+        'mb_out': round(sum(r['bytes_out'] for r in converted) / (1024 * 1024), 3),
+        'results': sorted(results, key=lambda r: r['input']),
+    }
+
+
+def run_merge(inputs, output_path, workers=None):
+    """Junta todas as imagens num único PDF, gravado direto no disco."""
+    converter = Converter()
+    converter.render_workers = workers
+    start = time.perf_counter()
+    converter.convert(inputs, 'jpg', 'pdf', output_path)
+    elapsed = time.perf_counter() - start
+    bytes_in = sum(os.path.getsize(path) for path in inputs)
+    return {
+        'conversion': 'jpg_to_pdf',
+        'output': os.path.abspath(output_path),
+        'pages': len(inputs),
+        'seconds': round(elapsed, 4),
+        'pages_per_second': round(len(inputs) / elapsed, 2) if elapsed else 0.0,
+        'mb_in': round(bytes_in / (1024 * 1024), 3),
+        'mb_out': round(os.path.getsize(output_path) / (1024 * 1024), 3),
+        'errors': 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte arquivos em lote, sem interface gráfica.")
+    parser.add_argument('entradas', nargs='+', help="Arquivos, diretórios ou padrões glob (ex.: 'extratos/**/*.ofx').")
+    parser.add_argument('--de', required=True, choices=sorted(EXTENSIONS), help="Formato de origem.")
+    parser.add_argument('--para', required=True, help="Formato(s) de destino, separados por vírgula (ex.: csv,pdf,xml): o arquivo é lido uma vez só.")
+    parser.add_argument('--saida', help="Diretório de saída (padrão: ao lado de cada arquivo de origem).")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos (padrão: núcleos da máquina).")
+    parser.add_argument('--forcar', action='store_true', help="Converte mesmo quando o resultado já está em dia.")
+    parser.add_argument('--silencioso', action='store_true', help="Não mostra o progresso na saída de erro.")
+    parser.add_argument('--medir', action='store_true', help="Inclui no resumo o tempo, os bytes e a memória de cada etapa da conversão de cada arquivo.")
+    pdf_group = parser.add_argument_group("PDF para JPG")
+    pdf_group.add_argument('--dpi', type=int, help="Resolução das imagens (padrão: 72).")
+    pdf_group.add_argument('--qualidade', type=int, help="Qualidade do JPEG, de 1 a 100 (padrão: 95).")
+    pdf_group.add_argument('--paginas', help="Páginas a converter, ex.: '1-3,7' (padrão: todas).")
+    pdf_group.add_argument('--cor', choices=['rgb', 'gray', 'cmyk'], help="Espaço de cor (padrão: rgb).")
+    parser.add_argument('--juntar', metavar='ARQUIVO_PDF', help="JPG para PDF: junta todas as imagens, em ordem alfabética, num único PDF.")
+    parser.add_argument('--mapeamento', metavar='ARQUIVO_JSON', help="XML para CSV/OFX: onde estão os registros e campos no XML (padrão: formato do ofx_to_xml).")
+    args = parser.parse_args(argv)
+    to_formats = [fmt.strip().lower() for fmt in args.para.split(',') if fmt.strip()]
+    invalid = [fmt for fmt in to_formats if fmt not in EXTENSIONS]
+    if not to_formats or invalid:
+        parser.error(f"formato de destino inválido: '{args.para}' (use {', '.join(sorted(EXTENSIONS))}).")
+    if args.juntar and (args.de, to_formats) != ('jpg', ['pdf']):
+        parser.error("--juntar só vale para --de jpg --para pdf.")
+    if args.mapeamento and args.de != 'xml':
+        parser.error("--mapeamento só vale para --de xml.")
+
+    options = {}
+    if (args.de, to_formats) == ('pdf', ['jpg']):
+        given = {'dpi': args.dpi, 'quality': args.qualidade, 'pages': args.paginas, 'colorspace': args.cor}
+        options = {key: value for key, value in given.items() if value is not None}
+    elif args.mapeamento:
+        try:
+            # Valida uma vez só, antes de distribuir os arquivos entre os processos
+            XmlMapping.from_json(args.mapeamento)
+        except ValueError as e:
+            parser.error(str(e))
+        options = {'mapping': os.path.abspath(args.mapeamento)}
+
+    inputs = find_inputs(args.entradas, args.de)
+    if not inputs:
+        print("Nenhum arquivo de entrada encontrado.", file=sys.stderr)
+        return 2
+
+    log = None if args.silencioso else (lambda message: print(message, file=sys.stderr))
+    try:
+        if args.juntar:
+            summary = run_merge(inputs, args.juntar, args.processos)
+        else:
+            summary = run_batch(inputs, args.de, to_formats, args.saida, args.processos, args.forcar, log, options, args.medir)
+    except NotImplementedError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+Benchmark das conversões, com arquivos sintéticos.
+
+Gera extratos OFX (SGML, XML e SGML com encoding declarado errado), CSV, XML,
+PDFs de várias páginas e conjuntos de JPEG no tamanho pedido e mede cada
+conversão suportada: tempo total, pico de memória (RSS) e vazão em linhas,
+páginas ou imagens por segundo. Cada medição roda num processo novo, com as
+bibliotecas já importadas, para que o pico de memória seja só daquela
+conversão e o custo de importação (medido pelo startup.py) não entre na conta.
+
+O resultado é um JSON; com --base ele é comparado com uma execução anterior
+(ex.: de outro commit) e o programa falha se alguma conversão ficou mais lenta:
+
+    python bench.py --tamanho medio --saida antes.json
+    python bench.py --tamanho medio --base antes.json
+    python bench.py --conversoes ofx:pdf,pdf:jpg --transacoes 500000 --paginas 50
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from converter import Converter
+from conversions import supported_targets
+from instrumentation import peak_rss_mb
+from xml_stream import XmlRecordWriter
+
+SIZES = {
+    'pequeno': {'transacoes': 10_000, 'paginas': 5, 'imagens': 5},
+    'medio': {'transacoes': 200_000, 'paginas': 40, 'imagens': 30},
+    'grande': {'transacoes': 2_000_000, 'paginas': 300, 'imagens': 150},
+}
+# Conjuntos de dados: nome -> (formato de origem, unidade da vazão)
+DATASETS = {
+    'ofx_sgml': ('ofx', 'linhas'),
+    'ofx_xml': ('ofx', 'linhas'),
+    'ofx_encoding_ruim': ('ofx', 'linhas'),
+    'csv': ('csv', 'linhas'),
+    'xml': ('xml', 'linhas'),
+    'pdf': ('pdf', 'páginas'),
+    'jpg': ('jpg', 'imagens'),
+}
+# Dimensões das imagens geradas (A4 a 150 dpi)
+IMAGE_SIZE = (1240, 1754)
+REPEATS = 1
+# Aumento relativo do tempo aceito em relação à base, e o mínimo absoluto
+REGRESSION_TOLERANCE = 0.20
+REGRESSION_MIN_SECONDS = 0.05
+SEED = 1234
+
+_WORDS = ("Pagamento", "Compra", "Transferência", "PIX", "Tarifa", "Depósito", "Saque", "Boleto",
+          "Café", "Padaria", "Mercado", "Farmácia", "Posto", "Aluguel", "Salário", "Restaurante")
+
+
+# --- Geradores ---
+
+def _transactions(count, seed=SEED):
+    """(data, descrição, valor em centavos, id) determinísticos."""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    for i in range(count):
+        day = start + timedelta(days=i * 1096 // max(count, 1))
+        memo = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} & cia {i}"
+        cents = rng.randint(-500_000, 500_000)
+        yield day, memo, cents, f"ID{i:08d}"
+
+
+def _amount(cents, decimal='.'):
+    text = f"{abs(cents) // 100}{decimal}{abs(cents) % 100:02d}"
+    return f"-{text}" if cents < 0 else text
+
+
+def _write_lines(path, lines, encoding, errors='strict'):
+    with open(path, 'w', encoding=encoding, errors=errors, newline='') as f:
+        block = []
+        for line in lines:
+            block.append(line)
+            if len(block) >= 10_000:
+                f.write("".join(block))
+                block = []
+        f.write("".join(block))
+
+
+def generate_ofx(path, count, flavor='sgml'):
+    """
+    Extrato OFX com `count` transações. `flavor` é 'sgml' (1.x, cp1252),
+    'xml' (2.x, UTF-8) ou 'encoding_ruim' (SGML que declara UTF-8 mas
+    tem bytes cp1252, como o de alguns bancos).
+    """
+    def lines():
+        if flavor == 'xml':
+            yield ('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+                   '<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>\n')
+        else:
+            encoding, charset = ('UTF-8', 'NONE') if flavor == 'encoding_ruim' else ('USASCII', '1252')
+            yield (f"OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:{encoding}\n"
+                   f"CHARSET:{charset}\nCOMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n")
+        yield ("<OFX><SIGNONMSGSRSV1><SONRS><STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>"
+               "<DTSERVER>20230101</DTSERVER><LANGUAGE>POR</LANGUAGE></SONRS></SIGNONMSGSRSV1>\n"
+               "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1</TRNUID><STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>\n"
+               "<STMTRS><CURDEF>BRL</CURDEF><BANKACCTFROM><BANKID>1</BANKID><ACCTID>123</ACCTID>"
+               "<ACCTTYPE>CHECKING</ACCTTYPE></BANKACCTFROM>\n<BANKTRANLIST><DTSTART>20200101</DTSTART><DTEND>20221231</DTEND>\n"
+               if flavor == 'xml' else
+               "<OFX>\n<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS><DTSERVER>20230101<LANGUAGE>POR</SONRS></SIGNONMSGSRSV1>\n"
+               "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS>\n"
+               "<STMTRS><CURDEF>BRL<BANKACCTFROM><BANKID>1<ACCTID>123<ACCTTYPE>CHECKING</BANKACCTFROM>\n"
+               "<BANKTRANLIST><DTSTART>20200101<DTEND>20221231\n")
+        for day, memo, cents, fitid in _transactions(count):
+            kind = 'DEBIT' if cents < 0 else 'CREDIT'
+            posted = f"{day:%Y%m%d}120000[-3:BRT]"
+            if flavor == 'xml':
+                memo = memo.replace('&', '&amp;')
+                yield (f"<STMTTRN><TRNTYPE>{kind}</TRNTYPE><DTPOSTED>{posted}</DTPOSTED><TRNAMT>{_amount(cents)}</TRNAMT>"
+                       f"<FITID>{fitid}</FITID><MEMO>{memo}</MEMO></STMTTRN>\n")
+            else:
+                yield (f"<STMTTRN>\n<TRNTYPE>{kind}\n<DTPOSTED>{posted}\n<TRNAMT>{_amount(cents)}\n"
+                       f"<FITID>{fitid}\n<MEMO>{memo}\n</STMTTRN>\n")
+        if flavor == 'xml':
+            yield ("</BANKTRANLIST><LEDGERBAL><BALAMT>0.00</BALAMT><DTASOF>20221231</DTASOF></LEDGERBAL>"
+                   "</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+        else:
+            yield "</BANKTRANLIST><LEDGERBAL><BALAMT>0.00<DTASOF>20221231</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+
+    _write_lines(path, lines(), 'utf-8' if flavor == 'xml' else 'cp1252')
+
+
+def generate_csv(path, count):
+    """CSV no formato aceito pelo aplicativo: data;descricao;valor, com vírgula decimal."""
+    def lines():
+        yield "data;descricao;valor\n"
+        for i, (day, memo, cents, _) in enumerate(_transactions(count)):
+            if i % 3 == 0:
+                # Parte dos valores vem formatada como moeda, com separador de milhar
+                integer = f"{abs(cents) // 100:,}".replace(',', '.')
+                value = f"R$ {'-' if cents < 0 else ''}{integer},{abs(cents) % 100:02d}"
+            else:
+                value = _amount(cents, ',')
+            yield f"{day:%d/%m/%Y};{memo};{value}\n"
+
+    _write_lines(path, lines(), 'utf-8')
+
+
+def generate_xml(path, count):
+    """XML no formato gerado pelo ofx_to_xml (reconhecido sem mapeamento)."""
+    with open(path, 'wb') as f:
+        writer = XmlRecordWriter(f, 'ExtratoOFX')
+        for day, memo, cents, fitid in _transactions(count):
+            writer.write_record('Transacao', (('Data', day.isoformat()), ('Descricao', memo),
+                                              ('Valor', _amount(cents)), ('ID', fitid)))
+        writer.close()
+
+
+def generate_pdf(path, pages):
+    """PDF com `pages` páginas de texto e figuras simples, como um documento digitalizado."""
+    import fitz
+
+    rng = random.Random(SEED)
+    document = fitz.open()
+    try:
+        for number in range(1, pages + 1):
+            page = document.new_page(width=595, height=842)
+            page.insert_text((50, 60), f"Documento sintético - página {number}", fontsize=16)
+            for line in range(45):
+                words = " ".join(rng.choice(_WORDS) for _ in range(8))
+                page.insert_text((50, 90 + line * 16), words, fontsize=10)
+            for _ in range(4):
+                x, y = rng.randint(50, 450), rng.randint(100, 700)
+                page.draw_rect(fitz.Rect(x, y, x + 90, y + 60), color=(0, 0, 0),
+                               fill=(rng.random(), rng.random(), rng.random()))
+        document.save(path, deflate=True)
+    finally:
+        document.close()
+
+
+def generate_jpegs(directory, count):
+    """`count` JPEGs do tamanho de uma página A4 digitalizada, com ruído (comprimem como fotos)."""
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    for number in range(1, count + 1):
+        noise = Image.effect_noise(IMAGE_SIZE, 40 + number % 20)
+        gradient = Image.linear_gradient('L').resize(IMAGE_SIZE)
+        image = Image.merge('RGB', (noise, gradient, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        image.save(os.path.join(directory, f"imagem_{number:04d}.jpg"), quality=90)
+
+
+def generate_dataset(name, directory, size):
+    """Gera (ou reaproveita, se já existir) o conjunto `name`; devolve (caminho, quantidade)."""
+    source, unit = DATASETS[name]
+    count = size['paginas'] if unit == 'páginas' else size['imagens'] if unit == 'imagens' else size['transacoes']
+    path = os.path.join(directory, f"{name}_{count}" + ('' if source == 'jpg' else f".{source}"))
+    if os.path.exists(path):
+        return path, count
+    temp_path = path + '.tmp'
+    if source == 'ofx':
+        generate_ofx(temp_path, count, name[len('ofx_'):])
+    elif source == 'csv':
+        generate_csv(temp_path, count)
+    elif source == 'xml':
+        generate_xml(temp_path, count)
+    elif source == 'pdf':
+        generate_pdf(temp_path, count)
+    else:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        generate_jpegs(temp_path, count)
+    # Só aparece com o nome final depois de completo, para ser reaproveitado com segurança
+    os.replace(temp_path, path)
+    return path, count
+
+
+# --- Medição ---
+
+def _output_bytes(paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def run_case(source, target, input_path, output_path):
+    """Executa uma conversão neste processo e devolve as medidas (chamada no processo filho)."""
+    from startup import prewarm
+
+    # Importações fora da medição: o custo delas é o que o startup.py mede
+    prewarm().join()
+    converter = Converter()
+    baseline = peak_rss_mb()
+    children_baseline = peak_rss_mb(children=True)
+    start = time.perf_counter()
+    written = converter.convert(input_path, source, target, output_path)
+    elapsed = time.perf_counter() - start
+    # O pico dos filhos já inclui os processos das importações; só conta se a conversão o aumentou
+    children_peak = peak_rss_mb(children=True)
+    return {
+        'segundos': round(elapsed, 3),
+        'rss_inicial_mb': baseline,
+        'pico_rss_mb': peak_rss_mb(),
+        'pico_rss_processos_mb': children_peak if children_peak != children_baseline else None,
+        'bytes_saida': _output_bytes(written),
+    }
+
+
+def measure(source, target, input_path, work_dir, repeats=REPEATS):
+    """Mede a conversão em processos novos; vale a execução mais rápida."""
+    output_path = os.path.join(work_dir, f"saida.{target}")
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--executar', source, target, input_path, output_path],
+                                capture_output=True, text=True, encoding='utf-8', errors='replace')
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return {'erro': lines[-1] if lines else f"código de saída {result.returncode}"}
+        # A última linha é o JSON (bibliotecas podem imprimir avisos antes)
+        measures = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or measures['segundos'] < best['segundos']:
+            best = measures
+    return best
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(size, datasets, conversions=None, data_dir=None, repeats=REPEATS, log=None):
+    """
+    Gera os dados e mede todas as conversões de cada conjunto.
+
+    `conversions` restringe as medições a pares (origem, destino).
+    """
+    temp_dir = tempfile.mkdtemp(prefix='bench_')
+    data_dir = data_dir or os.path.join(temp_dir, 'dados')
+    os.makedirs(data_dir, exist_ok=True)
+    work_dir = os.path.join(temp_dir, 'saida')
+    os.makedirs(work_dir)
+    results = {}
+    try:
+        for name in datasets:
+            source, unit = DATASETS[name]
+            targets = [t for t in supported_targets(source) if conversions is None or (source, t) in conversions]
+            if not targets:
+                continue
+            if log:
+                log(f"Gerando {name}...")
+            input_path, count = generate_dataset(name, data_dir, size)
+            for target in targets:
+                case = f"{name}->{target}"
+                measures = measure(source, target, input_path, work_dir, repeats)
+                if 'segundos' in measures:
+                    measures[f"{unit}_por_segundo"] = round(count / measures['segundos'], 1) if measures['segundos'] else None
+                results[case] = {'quantidade': count, 'unidade': unit, **measures}
+                if log:
+                    log(f"{case}: " + (measures.get('erro') or f"{measures['segundos']} s, pico {measures['pico_rss_mb']} MB"))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'plataforma': sys.platform,
+        'nucleos': os.cpu_count(),
+        'tamanho': size,
+        'repeticoes': repeats,
+        'conversoes': results,
+    }
+
+
+def find_regressions(current, base, tolerance=REGRESSION_TOLERANCE, min_seconds=REGRESSION_MIN_SECONDS):
+    """Conversões mais lentas que na execução `base`: [(conversão, antes_s, agora_s)]."""
+    regressions = []
+    for case, now in current['conversoes'].items():
+        before = base.get('conversoes', {}).get(case)
+        if not before or 'segundos' not in now or 'segundos' not in before:
+            continue
+        if before.get('quantidade') != now['quantidade']:
+            continue
+        if now['segundos'] > before['segundos'] * (1 + tolerance) and now['segundos'] - before['segundos'] > min_seconds:
+            regressions.append((case, before['segundos'], now['segundos']))
+    return regressions
+
+
+def _parse_conversions(text):
+    pairs = set()
+    for item in text.split(','):
+        source, _, target = item.strip().lower().partition(':')
+        if not source or not target:
+            raise ValueError(f"conversão inválida: '{item.strip()}' (use origem:destino, ex.: ofx:csv).")
+        pairs.add((source, target))
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede as conversões com arquivos sintéticos.")
+    parser.add_argument('--tamanho', choices=list(SIZES), default='pequeno', help="Tamanho dos dados (padrão: %(default)s).")
+    parser.add_argument('--transacoes', type=int, help="Transações dos extratos OFX, CSV e XML (substitui o tamanho).")
+    parser.add_argument('--paginas', type=int, help="Páginas do PDF (substitui o tamanho).")
+    parser.add_argument('--imagens', type=int, help="Quantidade de JPEGs (substitui o tamanho).")
+    parser.add_argument('--dados', nargs='+', choices=list(DATASETS), default=list(DATASETS), help="Conjuntos de dados (padrão: todos).")
+    parser.add_argument('--conversoes', help="Só estas conversões, ex.: 'ofx:csv,pdf:jpg' (padrão: todas as suportadas).")
+    parser.add_argument('--repeticoes', type=int, default=REPEATS, help="Execuções de cada conversão; vale a mais rápida (padrão: %(default)s).")
+    parser.add_argument('--pasta-dados', metavar='DIRETORIO', help="Guarda os arquivos gerados aqui e os reaproveita nas próximas execuções.")
+    parser.add_argument('--saida', metavar='ARQUIVO_JSON', help="Grava o resultado neste arquivo, além de imprimir.")
+    parser.add_argument('--base', metavar='ARQUIVO_JSON', help="Execução anterior: falha se alguma conversão ficou mais lenta.")
+    parser.add_argument('--tolerancia', type=float, default=REGRESSION_TOLERANCE,
+                        help="Aumento relativo de tempo aceito em relação à base (padrão: %(default)s).")
+    parser.add_argument('--silencioso', action='store_true', help="Não mostra o progresso na saída de erro.")
+    # Uso interno: executa uma medição no processo filho
+    parser.add_argument('--executar', nargs=4, metavar=('ORIGEM', 'DESTINO', 'ENTRADA', 'SAIDA'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.executar:
+        source, target, input_path, output_path = args.executar
+        print(json.dumps(run_case(source, target, input_path, output_path)))
+        return 0
+
+    size = dict(SIZES[args.tamanho])
+    for key in ('transacoes', 'paginas', 'imagens'):
+        value = getattr(args, key)
+        if value is not None:
+            if value < 1:
+                parser.error(f"--{key} precisa ser pelo menos 1.")
+            size[key] = value
+    if args.repeticoes < 1:
+        parser.error("--repeticoes precisa ser pelo menos 1.")
+    conversions = None
+    if args.conversoes:
+        try:
+            conversions = _parse_conversions(args.conversoes)
+        except ValueError as e:
+            parser.error(str(e))
+
+    base = None
+    if args.base:
+        try:
+            with open(args.base, encoding='utf-8') as f:
+                base = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            parser.error(f"não foi possível ler a base '{args.base}' ({e}).")
+
+    log = None if args.silencioso else (lambda message: print(message, file=sys.stderr))
+    summary = run_benchmark(size, args.dados, conversions, args.pasta_dados, args.repeticoes, log)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+    errors = [case for case, measures in summary['conversoes'].items() if 'erro' in measures]
+    if base is not None:
+        for case, before, now in find_regressions(summary, base, args.tolerancia):
+            print(f"Regressão: {case} passou de {before} s para {now} s.", file=sys.stderr)
+            errors.append(case)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
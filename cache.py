@@ -0,0 +1,341 @@
+"""
+Cache de conversões, identificado pelo conteúdo dos arquivos de entrada.
+
+São duas camadas:
+
+- ConversionCache guarda em disco o resultado final de cada conversão. A
+  chave combina o hash SHA-256 do conteúdo da entrada, o nome da conversão e
+  as opções usadas, então renomear ou copiar o arquivo não invalida nada e
+  qualquer alteração no conteúdo gera uma chave nova. Quando o diretório passa
+  do limite de tamanho, os resultados usados há mais tempo são apagados.
+  Resultados gravados em arquivo (get_or_convert_file) são copiados para o
+  cache e de volta, sem passar pela memória. Para não reler a entrada inteira
+  a cada conversão, o cache guarda também um índice (caminho, tamanho, mtime)
+  -> chave: o hash só é calculado quando o arquivo é novo ou mudou.
+- ParsedCache guarda em memória o resultado da leitura de um OFX (a lista de
+  transações): converter o mesmo extrato para CSV, XML e PDF lê o arquivo uma
+  vez só.
+
+Falhas do cache (disco cheio, arquivo corrompido, permissão) nunca
+interrompem uma conversão: no pior caso o arquivo é convertido de novo.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Mude ao alterar o formato de alguma saída, para descartar resultados antigos
+CACHE_VERSION = 2
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Resultados maiores que isso não são guardados
+CACHE_MAX_ENTRY_BYTES = 128 * 1024 * 1024
+# Total de transações mantidas em memória pelo ParsedCache
+PARSED_MAX_TRANSACTIONS = 200_000
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_digest_lock = threading.Lock()
+# (caminho, tamanho, mtime) -> hash, para não reler o mesmo arquivo na sessão
+_digests = {}
+
+
+def default_cache_dir():
+    """Diretório de cache do usuário (LOCALAPPDATA no Windows, XDG_CACHE_HOME/~/.cache nos demais)."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'conversor_extratos')
+
+
+def file_digest(path):
+    """Hash SHA-256 do conteúdo do arquivo, lido em blocos."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digests.get(memo_key)
+    if digest is not None:
+        return digest
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digests[memo_key] = digest
+    return digest
+
+
+def input_digest(input_path):
+    """Hash da entrada (um arquivo ou uma lista de arquivos, em ordem); None se não der para calcular."""
+    paths = input_path if isinstance(input_path, (list, tuple)) else [input_path]
+    try:
+        if not paths or not all(os.path.isfile(path) for path in paths):
+            return None
+        if len(paths) == 1:
+            return file_digest(paths[0])
+        return hashlib.sha256(" ".join(file_digest(path) for path in paths).encode('ascii')).hexdigest()
+    except OSError:
+        return None
+
+
+def _result_size(result):
+    if isinstance(result, (list, tuple)):
+        return sum(len(item) for item in result)
+    return len(result)
+
+
+class ConversionCache:
+    """Resultados de conversões em disco, com descarte dos usados há mais tempo."""
+
+    def __init__(self, directory=None, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, conversion, input_path, options=None):
+        """Chave da conversão, ou None se a entrada não puder ser identificada pelo conteúdo."""
+        digest = input_digest(input_path)
+        if digest is None:
+            return None
+        parts = [str(CACHE_VERSION), digest, conversion]
+        parts += [f"{name}={value!r}" for name, value in sorted((options or {}).items())]
+        return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def stat_key(conversion, input_path, options=None):
+        """
+        Chave rápida da conversão, pelo caminho, tamanho e mtime das entradas
+        (sem ler o conteúdo); None se a entrada não for um arquivo (ou lista deles).
+        """
+        paths = input_path if isinstance(input_path, (list, tuple)) else [input_path]
+        try:
+            if not paths or not all(os.path.isfile(path) for path in paths):
+                return None
+            parts = [str(CACHE_VERSION), conversion]
+            for path in paths:
+                stat = os.stat(path)
+                parts.append(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}")
+        except OSError:
+            return None
+        parts += [f"{name}={value!r}" for name, value in sorted((options or {}).items())]
+        return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+    def resolve_key(self, conversion, input_path, options=None):
+        """
+        Devolve (chave rápida, chave por conteúdo). A chave por conteúdo vem do
+        índice quando a entrada não mudou desde a última conversão; só senão o
+        conteúdo é lido para calcular o hash.
+        """
+        stat_key = self.stat_key(conversion, input_path, options)
+        if stat_key is None:
+            return None, None
+        try:
+            with open(self._path(stat_key, '.ref'), 'r', encoding='ascii') as f:
+                key = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            key = ''
+        if len(key) != 64:
+            key = self.key(conversion, input_path, options)
+        return stat_key, key
+
+    def remember_key(self, stat_key, key):
+        """Grava no índice a chave por conteúdo da entrada identificada por `stat_key`."""
+        path = self._path(stat_key, '.ref')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='ascii') as f:
+                    f.write(key)
+                os.replace(temp_path, path)
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except OSError:
+            pass
+
+    def _path(self, key, suffix='.pickle'):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def get(self, key):
+        """Devolve o resultado guardado (str, bytes ou lista de bytes) ou None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            # O mtime marca o último uso, para o descarte LRU
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Arquivo truncado ou de outra versão: descarta e converte de novo
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if _result_size(result) > CACHE_MAX_ENTRY_BYTES:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                # Troca atômica: quem lê ao mesmo tempo nunca vê um arquivo pela metade
+                os.replace(temp_path, path)
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except OSError:
+            return
+        self.evict()
+
+    def get_or_convert(self, conversion, input_path, options, convert):
+        """Devolve o resultado guardado ou chama convert() e guarda o que ela devolver."""
+        stat_key, key = self.resolve_key(conversion, input_path, options)
+        if key is None:
+            return convert()
+        result = self.get(key)
+        if result is None:
+            result = convert()
+            self.put(key, result)
+        self.remember_key(stat_key, key)
+        return result
+
+    def get_files(self, key, output_path):
+        """
+        Copia o resultado guardado para `output_path` (e, se houver várias
+        páginas, para os nomes irmãos) e devolve os caminhos; None se não houver.
+        """
+        manifest = self.get(key)
+        if manifest is None:
+            return None
+        base = os.path.splitext(output_path)[0]
+        written = []
+        try:
+            for index, suffix in enumerate(manifest['arquivos']):
+                stored = self._path(key, f'.{index}.out')
+                shutil.copyfile(stored, base + suffix)
+                os.utime(stored)
+                written.append(base + suffix)
+        except (OSError, KeyError, TypeError):
+            # Parte do resultado já foi descartada: converte de novo
+            self.hits -= 1
+            self.misses += 1
+            for path in written:
+                self._remove(path)
+            self._remove(self._path(key))
+            return None
+        return written
+
+    def put_files(self, key, output_path, paths):
+        """Guarda uma cópia dos arquivos gravados por uma conversão em `output_path`."""
+        base = os.path.splitext(output_path)[0]
+        try:
+            if sum(os.path.getsize(path) for path in paths) > CACHE_MAX_ENTRY_BYTES:
+                return
+            if not all(path.startswith(base) for path in paths):
+                return
+            os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+            for index, path in enumerate(paths):
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self._path(key)), suffix='.tmp')
+                os.close(fd)
+                try:
+                    shutil.copyfile(path, temp_path)
+                    os.replace(temp_path, self._path(key, f'.{index}.out'))
+                except BaseException:
+                    self._remove(temp_path)
+                    raise
+        except OSError:
+            return
+        # O índice vai por último: só passa a valer com todos os arquivos no lugar
+        self.put(key, {'arquivos': [path[len(base):] for path in paths]})
+
+    def get_or_convert_file(self, conversion, input_path, options, output_path, convert):
+        """
+        Como get_or_convert, para conversões que gravam em `output_path`:
+        convert() devolve a lista de arquivos gravados.
+        """
+        stat_key, key = self.resolve_key(conversion, input_path, options)
+        if key is None:
+            return convert()
+        paths = self.get_files(key, output_path)
+        if paths is None:
+            paths = convert()
+            self.put_files(key, output_path, paths)
+        self.remember_key(stat_key, key)
+        return paths
+
+    def _entries(self):
+        entries = []
+        try:
+            for bucket in os.scandir(self.directory):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    if entry.name.endswith(('.pickle', '.out', '.ref')):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def evict(self):
+        """Apaga os resultados usados há mais tempo até o cache caber em max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ParsedCache:
+    """Transações de OFX já lidas, em memória, por hash do arquivo (LRU limitado por transações)."""
+
+    def __init__(self, max_transactions=PARSED_MAX_TRANSACTIONS):
+        self.max_transactions = max_transactions
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            transactions = self._entries.get(digest)
+            if transactions is not None:
+                self._entries.move_to_end(digest)
+            return transactions
+
+    def put(self, digest, transactions):
+        if len(transactions) > self.max_transactions:
+            return
+        with self._lock:
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[digest] = transactions
+            self._size += len(transactions)
+            while self._size > self.max_transactions:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
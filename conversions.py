@@ -0,0 +1,258 @@
+"""
+Registro de leitores e escritores e planejamento das rotas de conversão.
+
+Cada formato de origem tem um leitor, que produz um fluxo de blocos de um
+tipo intermediário ('transacoes', 'tabela', 'paginas', 'imagens'); cada
+formato de destino tem escritores que consomem um tipo intermediário.
+Adaptadores convertem um tipo em outro (ex.: uma tabela de CSV ou XML
+validada vira transações). Uma conversão é o caminho mais curto
+leitor -> adaptadores -> escritor; um formato novo só precisa registrar o
+seu leitor ou escritor para ganhar todas as rotas que passam por ele.
+
+Várias saídas podem ser geradas de uma vez (ex.: OFX -> CSV + PDF + XML):
+o arquivo é lido uma vez só e cada bloco é entregue a todos os escritores.
+"""
+import io
+import os
+from collections import deque
+from contextlib import contextmanager
+
+from instrumentation import output_size
+
+# formato -> Reader
+READERS = {}
+# (tipo de origem, tipo de destino) -> classe do adaptador
+ADAPTERS = {}
+# (tipo, formato) -> classe do escritor
+WRITERS = {}
+
+
+class Stream:
+    """Blocos de um tipo intermediário, com informações sobre a origem em `meta`."""
+
+    def __init__(self, kind, chunks, **meta):
+        self.kind = kind
+        self.chunks = chunks
+        self.meta = meta
+
+
+class Reader:
+    def __init__(self, fmt, kind, read, options):
+        self.format = fmt
+        self.kind = kind
+        self.read = read
+        self.options = options
+
+
+def reader(fmt, kind, options=()):
+    """
+    Registra `read(converter, input_path, **opções) -> Stream` como leitor de `fmt`.
+    `options` são os nomes das opções aceitas (ex.: 'dpi').
+    """
+    def register(read):
+        READERS[fmt] = Reader(fmt, kind, read, tuple(options))
+        return read
+    return register
+
+
+def adapter(source_kind, target_kind):
+    """Registra uma classe Adapter que converte blocos de `source_kind` em `target_kind`."""
+    def register(cls):
+        ADAPTERS[(source_kind, target_kind)] = cls
+        return cls
+    return register
+
+
+def writer(kind, fmt):
+    """Registra uma classe Writer que grava blocos de `kind` no formato `fmt`."""
+    def register(cls):
+        WRITERS[(kind, fmt)] = cls
+        return cls
+    return register
+
+
+class Adapter:
+    """Transforma bloco a bloco; `meta` descreve o fluxo produzido."""
+    # Nome da etapa nas medições (instrumentation.py)
+    stage = "transformação"
+
+    def __init__(self, converter, meta):
+        self.converter = converter
+        self.meta = dict(meta)
+
+    def transform(self, chunk):
+        raise NotImplementedError
+
+
+class Writer:
+    """
+    Grava os blocos recebidos em `output_path` ou, sem ele, em memória.
+
+    close() devolve [output_path] ou o conteúdo (str, ou bytes se `binary`).
+    Os blocos recebidos são compartilhados com outros escritores e não
+    devem ser alterados.
+    """
+    binary = False
+    options = ()
+
+    def __init__(self, converter, meta, output_path=None, **options):
+        self.converter = converter
+        self.meta = meta
+        self.output_path = output_path
+        if output_path:
+            self.sink = open(output_path, 'wb') if self.binary else open(output_path, 'w', encoding='utf-8', newline='')
+        else:
+            self.sink = io.BytesIO() if self.binary else io.StringIO()
+
+    def write(self, chunk):
+        raise NotImplementedError
+
+    def finish(self):
+        """Completa o documento depois do último bloco."""
+
+    def close(self):
+        try:
+            self.finish()
+            if self.output_path:
+                return [self.output_path]
+            return self.sink.getvalue()
+        finally:
+            self.sink.close()
+
+    def abort(self):
+        """Descarta a saída incompleta depois de um erro ou cancelamento."""
+        self.sink.close()
+        if self.output_path:
+            try:
+                os.remove(self.output_path)
+            except OSError:
+                pass
+
+
+class Route:
+    def __init__(self, reader, adapters, writer, target):
+        self.reader = reader
+        self.adapters = adapters
+        self.writer = writer
+        self.target = target
+
+    @property
+    def options(self):
+        return set(self.reader.options) | set(self.writer.options)
+
+    def describe(self):
+        steps = [self.reader.format, self.reader.kind]
+        steps += [target for _, target in self.adapters]
+        return " -> ".join(steps + [self.target])
+
+
+def plan_route(source, target):
+    """Caminho mais curto de `source` até `target` (busca em largura pelos tipos intermediários)."""
+    # De um formato para ele mesmo não há conversão: o arquivo só seria regravado, perdendo dados
+    read = READERS.get(source) if source != target else None
+    if read is not None:
+        queue = deque([(read.kind, [])])
+        seen = {read.kind}
+        while queue:
+            kind, steps = queue.popleft()
+            if (kind, target) in WRITERS:
+                return Route(read, steps, WRITERS[(kind, target)], target)
+            for (origin, destination) in ADAPTERS:
+                if origin == kind and destination not in seen:
+                    seen.add(destination)
+                    queue.append((destination, steps + [(origin, destination)]))
+    raise NotImplementedError(f"A conversão de {source.upper()} para {target.upper()} não é suportada.")
+
+
+def can_convert(source, target):
+    try:
+        plan_route(source, target)
+    except NotImplementedError:
+        return False
+    return True
+
+
+def supported_targets(source):
+    """Formatos de destino alcançáveis a partir de `source`."""
+    targets = {fmt for _, fmt in WRITERS}
+    return sorted(target for target in targets if can_convert(source, target))
+
+
+@contextmanager
+def _unmeasured(name, items=0, bytes_in=0):
+    yield {'bytes_out': 0}
+
+
+def _chunk_items(chunk):
+    """Linhas de um DataFrame; uma página ou imagem nos demais tipos."""
+    shape = getattr(chunk, 'shape', None)
+    return shape[0] if shape else 1
+
+
+def _input_size(input_path):
+    paths = input_path if isinstance(input_path, (list, tuple)) else [input_path]
+    return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+
+
+def run_conversions(converter, input_path, source, outputs, options=None):
+    """
+    Lê `input_path` uma vez e grava todas as saídas pedidas.
+
+    `outputs` liga cada formato de destino a um caminho de saída (ou None
+    para receber o resultado em memória). Devolve {formato: resultado}.
+    Se `converter.instrumentation` estiver definido, cada etapa é medida.
+    """
+    options = dict(options or {})
+    routes = {target: plan_route(source, target) for target in outputs}
+    accepted = set().union(*(route.options for route in routes.values())) if routes else set()
+    unknown = sorted(set(options) - accepted)
+    if unknown:
+        raise ValueError(f"Opção não suportada nesta conversão: {', '.join(unknown)}.")
+
+    instrumentation = getattr(converter, 'instrumentation', None)
+    measure = instrumentation.measure if instrumentation is not None else _unmeasured
+    read = READERS[source]
+    read_stage = f"leitura {source}"
+    with measure(read_stage, bytes_in=_input_size(input_path)):
+        stream = read.read(converter, input_path, **{k: v for k, v in options.items() if k in read.options})
+    chunks = stream.chunks
+    if instrumentation is not None:
+        # A leitura e a decodificação acontecem sob demanda, a cada bloco pedido
+        chunks = instrumentation.iter_measured(read_stage, chunks, _chunk_items)
+    pipelines = []
+    try:
+        for target, route in routes.items():
+            meta = stream.meta
+            adapters = []
+            for key in route.adapters:
+                step = ADAPTERS[key](converter, meta)
+                meta = step.meta
+                adapters.append(step)
+            writer_options = {k: v for k, v in options.items() if k in route.writer.options}
+            pipelines.append((target, adapters, route.writer(converter, meta, outputs[target], **writer_options)))
+
+        for chunk in chunks:
+            for target, adapters, output in pipelines:
+                block = chunk
+                for step in adapters:
+                    with measure(step.stage, items=_chunk_items(block)):
+                        block = step.transform(block)
+                with measure(f"escrita {target}", items=_chunk_items(block)):
+                    output.write(block)
+        results = {}
+        while pipelines:
+            target, _, output = pipelines[0]
+            with measure(f"gravação {target}") as counts:
+                results[target] = output.close()
+                if instrumentation is not None:
+                    counts['bytes_out'] = output_size(results[target])
+            pipelines.pop(0)
+        return results
+    except BaseException:
+        for _, _, output in pipelines:
+            output.abort()
+        # Encerra o leitor já (ex.: o pool de processos da rasterização)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        raise
@@ -1,184 +1,410 @@
 import csv
-from datetime import datetime
-from ofxparse import OfxParser
-import pandas as pd
-import xml.etree.ElementTree as ET
-import fitz
-from PIL import Image
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from itertools import islice
+import os
+from ofx_stream import iter_ofx_transactions
+from csv_ingest import CHUNK_MEMORY_BYTES, iter_csv_chunks, describe_rows, sniff_csv
+from raster import DEFAULT_DPI, DEFAULT_QUALITY, iter_pdf_pages, page_output_path
+from pdf_assembler import DEFAULT_RESOLUTION, PdfImageWriter, iter_prepared_images, list_images
+from cache import input_digest
+from xml_stream import OFX_XML_MAPPING, XmlMapping, XmlRecordWriter, describe_records, iter_xml_records
+from conversions import Adapter, Stream, Writer, adapter, reader, run_conversions, writer
+# pandas, PyMuPDF, Pillow e reportlab são importados só pela conversão que
+# precisa deles, para a janela abrir rápido (ver startup.py)
+
+# Quantidade de transações/linhas agrupadas por DataFrame ao converter
+OFX_CHUNK_SIZE = 10000
+# A cada quantos itens (transações, linhas) o progresso é informado
+PROGRESS_EVERY = 1000
+
+
+def _chunked(iterable, size):
+    """Agrupa um iterável em listas de até `size` itens."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Converter:
+    def __init__(self):
+        # Chamado como on_progress(feito, total) durante as conversões longas.
+        # Pode lançar uma exceção para interromper a conversão (cancelamento).
+        self.on_progress = None
+        # Orçamento de memória de cada bloco de linhas na leitura de CSV
+        self.csv_chunk_bytes = CHUNK_MEMORY_BYTES
+        # Processos usados para rasterizar PDFs e decodificar imagens (None = núcleos da máquina)
+        self.render_workers = None
+        # cache.ParsedCache compartilhado entre conversões (None = sem cache)
+        self.parsed_cache = None
+        # instrumentation.Instrumentation que mede cada etapa (None = sem medição)
+        self.instrumentation = None
+
+    def _report_progress(self, done, total):
+        if self.on_progress is not None:
+            self.on_progress(done, total)
+
+    def _note_fallback(self, message):
+        """Anota nas medições um caminho alternativo tomado na conversão."""
+        if self.instrumentation is not None:
+            self.instrumentation.note(message)
+
     # --- FUNÇÃO AUXILIAR ROBUSTA PARA LER OFX ---
-    def _parse_ofx_robust(self, input_path):
+    def _iter_ofx_transactions(self, input_path):
         """
-        Função auxiliar para ler um arquivo OFX de forma robusta,
-        lidando com erros de encoding comuns em bancos.
+        Lê as transações de um OFX uma a uma, sem carregar o arquivo inteiro.
+        O encoding real é detectado pelo início do arquivo (bancos costumam
+        declarar US-ASCII e mandar LATIN-1), então basta uma única leitura.
         """
-        try:
-            # TENTATIVA 1: Modo padrão (binário). O ofxparse deve ler o header.
-            with open(input_path, 'rb') as f:
-                return OfxParser.parse(f)
-        except (UnicodeDecodeError, LookupError, ET.ParseError) as e:
-            # TENTATIVA 2: Falha. O banco pode estar mentindo no encoding (ex: diz US-ASCII mas usa LATIN-1).
-            # Vamos forçar a decodificação com latin-1, que é permissivo.
-            try:
-                with open(input_path, 'rb') as f:
-                    raw_data = f.read()
-                
-                # 'latin-1' (ISO-8859-1) não falha, 'replace' troca bytes ruins por '?'
-                decoded_string = raw_data.decode('latin-1', errors='replace')
-                
-                # Passa a string decodificada para o parser
-                string_io = io.StringIO(decoded_string)
-                return OfxParser.parse(string_io)
-            except Exception as e_fallback:
-                # Se falhar mesmo assim, o arquivo está muito corrompido.
-                raise ValueError(f"Falha ao processar OFX. Tentativa padrão falhou ({e}) e fallback também falhou ({e_fallback}).")
-
-    def ofx_to_csv(self, input_path):
-        # USA A FUNÇÃO ROBUSTA
-        ofx = self._parse_ofx_robust(input_path)
-        
-        account = ofx.account
-        statement = account.statement
-        transactions = [{'data': t.date.strftime('%Y-%m-%d'), 'descricao': t.memo, 'valor': t.amount, 'id': t.id} for t in statement.transactions]
-        df = pd.DataFrame(transactions)
-        return df.to_csv(index=False, sep=';', decimal=',')
-
-    def csv_to_ofx(self, input_path):
-        # Tenta ler com UTF-8, se falhar, tenta com Latin-1
-        try:
-            df = pd.read_csv(input_path, sep=';', decimal=',', encoding='utf-8')
-        except UnicodeDecodeError:
-            df = pd.read_csv(input_path, sep=';', decimal=',', encoding='latin-1')
-        
-        if not all(col in df.columns for col in ['data', 'descricao', 'valor']):
-            raise ValueError("Erro: O CSV precisa ter as colunas 'data', 'descricao' e 'valor'.")
+        digest = input_digest(input_path) if self.parsed_cache is not None else None
+        cached = self.parsed_cache.get(digest) if digest else None
+        if cached is not None:
+            # Mesmo extrato já lido por outra conversão
+            self._note_fallback("extrato OFX reaproveitado do cache em memória, sem reler o arquivo")
+            self._report_progress(1, 1)
+            yield from cached
+            return
+
+        collected = [] if digest else None
+        with open(input_path, 'rb') as f:
+            total = os.fstat(f.fileno()).st_size
+            for count, transaction in enumerate(iter_ofx_transactions(f, self._note_fallback), 1):
+                if count % PROGRESS_EVERY == 0:
+                    self._report_progress(f.tell(), total)
+                if collected is not None:
+                    collected.append(transaction)
+                    if len(collected) > self.parsed_cache.max_transactions:
+                        # Grande demais para guardar em memória
+                        collected = None
+                yield transaction
+            self._report_progress(total, total)
+        if collected is not None:
+            self.parsed_cache.put(digest, collected)
+
+    def convert(self, input_path, source, target, output_path=None, **options):
+        """
+        Converte `input_path` do formato `source` para `target` pela rota
+        registrada em conversions. Com `output_path` o resultado é gravado
+        direto no disco e a função devolve a lista de arquivos gravados; senão,
+        devolve o conteúdo (str, bytes ou, no caso de páginas JPG, lista de bytes).
+        """
+        return run_conversions(self, input_path, source, {target: output_path}, options)[target]
+
+    def convert_many(self, input_path, source, outputs, **options):
+        """Lê a entrada uma vez só e gera todas as saídas de `outputs` ({formato: caminho ou None})."""
+        return run_conversions(self, input_path, source, outputs, options)
+
+    # --- FUNÇÕES AUXILIARES PARA LER CSV ---
+    def _iter_csv(self, input_path, dialect=None):
+        """Lê o CSV em blocos (encoding e separadores detectados uma única vez)."""
+        return iter_csv_chunks(input_path, self.csv_chunk_bytes, progress=self._report_progress,
+                               on_fallback=self._note_fallback, dialect=dialect)
+
+    def _validate_transactions(self, df, decimal=',', date_format=None, describe=describe_rows):
+        """
+        Valida e converte 'valor' e 'data' de um bloco, apontando as linhas com erro.
+        No CSV o decimal e o formato das datas vêm da amostra lida por
+        sniff_csv; o XML informa os dois pelo mapeamento.
+        """
+        import pandas as pd
 
         # --- VALIDAÇÃO DE 'VALOR' ---
-        # 1. Limpa a coluna 'valor' de caracteres não numéricos (R$, espaços, ".")
-        df['valor'] = df['valor'].astype(str).str.replace(r'[R$\s.]', '', regex=True)
-        # 2. Converte para numérico, tratando vírgula como decimal.
-        df['valor'] = pd.to_numeric(df['valor'].str.replace(',', '.'), errors='coerce')
+        # 1. Limpa a coluna 'valor' de caracteres não numéricos (R$, espaços, separador de milhar)
+        thousands = '.' if decimal == ',' else ','
+        df['valor'] = df['valor'].astype(str).str.replace(rf'[R$\s{thousands}]', '', regex=True)
+        # 2. Converte para numérico, tratando o separador decimal.
+        df['valor'] = pd.to_numeric(df['valor'].str.replace(decimal, '.', regex=False), errors='coerce')
         # 3. Verifica se alguma linha falhou na conversão
-        if df['valor'].isnull().any():
-            raise ValueError("Erro: A coluna 'valor' contém dados não numéricos que não puderam ser convertidos.")
+        invalid = df.index[df['valor'].isnull()]
+        if len(invalid):
+            raise ValueError(f"Erro: A coluna 'valor' contém dados não numéricos que não puderam ser convertidos ({describe(invalid)}).")
 
         # --- VALIDAÇÃO DE 'DATA' ---
-        # Tenta converter a data. 'dayfirst=True' trata 'dd/mm/YYYY'.
-        df['data'] = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
-        if df['data'].isnull().any():
-            raise ValueError("Erro: A coluna 'data' contém formatos de data inválidos que não puderam ser lidos.")
-
-        # ... (Restante da lógica do CSV para OFX) ...
-        ofx_content = "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\nCOMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n<OFX>\n  <SIGNONMSGSRSV1>\n    <SONRS>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <DTSERVER>{date_now}</DTSERVER>\n      <LANGUAGE>POR</LANGUAGE>\n    </SONRS>\n  </SIGNONMSGSRSV1>\n  <BANKMSGSRSV1>\n    <STMTTRNRS>\n      <TRNUID>1</TRNUID>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <STMTRS>\n        <CURDEF>BRL</CURDEF>\n        <BANKACCTFROM>\n          <BANKID>000</BANKID>\n          <ACCTID>00000-0</ACCTID>\n          <ACCTTYPE>CHECKING</ACCTTYPE>\n        </BANKACCTFROM>\n        <BANKTRANLIST>\n          <DTSTART>{start_date}</DTSTART>\n          <DTEND>{end_date}</DTEND>\n          {transactions}\n        </BANKTRANLIST>\n      </STMTRS>\n    </STMTTRNRS>\n  </BANKMSGSRSV1>\n</OFX>"
-        transaction_template = "\n          <STMTTRN>\n            <TRNTYPE>{trntype}</TRNTYPE>\n            <DTPOSTED>{dtposted}</DTPOSTED>\n            <TRNAMT>{trnamt}</TRNAMT>\n            <FITID>{fitid}</FITID>\n            <MEMO>{memo}</MEMO>\n          </STMTTRN>"
-        transactions_str = ""
-        
-        for index, row in df.iterrows():
-            trans_type = "CREDIT" if row['valor'] >= 0 else "DEBIT"
-            transactions_str += transaction_template.format(trntype=trans_type, dtposted=row['data'].strftime('%Y%m%d%H%M%S'), trnamt=f"{row['valor']:.2f}", fitid=f"{row['data'].strftime('%Y%m%d')}{index}", memo=row['descricao'])
-        
-        start_date, end_date = df['data'].min().strftime('%Y%m%d%H%M%S'), df['data'].max().strftime('%Y%m%d%H%M%S')
-        return ofx_content.format(date_now=datetime.now().strftime('%Y%m%d%H%M%S'), start_date=start_date, end_date=end_date, transactions=transactions_str)
-
-    def pdf_to_jpg(self, input_path):
-        doc = fitz.open(input_path)
-        images_bytes = [page.get_pixmap().tobytes("jpeg") for page in doc]
-        if not images_bytes: raise ValueError("Não foi possível extrair imagens do PDF.")
-        return images_bytes
-
-    def jpg_to_pdf(self, input_path):
-        try:
-            image = Image.open(input_path)
-        except Exception:
-            raise ValueError(f"O arquivo '{input_path.split('/')[-1]}' não é um formato de imagem válido (JPG, PNG, etc.).")
-        
-        if image.mode == 'RGBA': image = image.convert('RGB')
-        pdf_bytes = io.BytesIO()
-        image.save(pdf_bytes, "PDF", resolution=100.0)
-        return pdf_bytes.getvalue()
-
-    # --- NOVAS FUNÇÕES IMPLEMENTADAS ---
-
-    def _create_pdf_from_dataframe(self, df, title):
-        """Função auxiliar para criar um PDF a partir de um DataFrame do Pandas."""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        
-        elements = []
-        elements.append(Paragraph(title, styles['h1']))
-        
-        data = [df.columns.to_list()] + df.values.tolist()
-        
-        style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ])
-        
-        table = Table(data)
-        table.setStyle(style)
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        return buffer.getvalue()
-
-    def ofx_to_pdf(self, input_path):
-        """NOVO: Converte um arquivo OFX para um relatório em PDF."""
-        # USA A FUNÇÃO ROBUSTA
-        ofx = self._parse_ofx_robust(input_path)
-        
-        transactions = [{'Data': t.date.strftime('%d/%m/%Y'), 'Descrição': t.memo, 'Valor': f"{t.amount:.2f}"} for t in ofx.account.statement.transactions]
-        df = pd.DataFrame(transactions)
-        
-        return self._create_pdf_from_dataframe(df, "Extrato OFX")
-
-    def csv_to_pdf(self, input_path):
-        """NOVO: Converte um arquivo CSV para um relatório em PDF."""
-        try:
-            df = pd.read_csv(input_path, sep=';', decimal=',', encoding='utf-8')
-        except UnicodeDecodeError:
-            df = pd.read_csv(input_path, sep=';', decimal=',', encoding='latin-1')
-        
-        return self._create_pdf_from_dataframe(df, "Relatório CSV")
-
-    def ofx_to_xml(self, input_path):
-        """NOVO: Converte um arquivo OFX para um XML simples."""
-        # USA A FUNÇÃO ROBUSTA
-        ofx = self._parse_ofx_robust(input_path)
-        
-        root = ET.Element("ExtratoOFX")
-        account = ofx.account
-        
-        for t in account.statement.transactions:
-            transacao = ET.SubElement(root, "Transacao")
-            ET.SubElement(transacao, "Data").text = t.date.strftime('%Y-%m-%d')
-            ET.SubElement(transacao, "Descricao").text = t.memo
-            ET.SubElement(transacao, "Valor").text = str(t.amount)
-            ET.SubElement(transacao, "ID").text = t.id
-            
-        tree = ET.ElementTree(root)
-        xml_bytes = io.BytesIO()
-        tree.write(xml_bytes, encoding='utf-8', xml_declaration=True)
-        return xml_bytes.getvalue().decode('utf-8')
-
-    # --- Funções que permanecem não implementadas (por complexidade) ---
-    def xml_to_ofx(self, input_path):
-        raise NotImplementedError("Função XML para OFX não implementada (XML pode ter formatos variados).")
-        
-    def xml_to_csv(self, input_path):
-        raise NotImplementedError("Função XML para CSV não implementada (XML pode ter formatos variados).")
-        
-    def csv_to_xml(self, input_path):
-        raise NotImplementedError("Função CSV para XML não implementada (Estrutura de destino do XML não definida).")
\ No newline at end of file
+        # Tenta converter a data. Sem formato, cada data é lida sozinha ('mixed', com
+        # 'dayfirst=True' para 'dd/mm/YYYY'): o pandas não deduz um formato da
+        # primeira data do bloco, que poderia não valer para os outros blocos.
+        if date_format:
+            df['data'] = pd.to_datetime(df['data'], format=date_format, errors='coerce')
+        else:
+            df['data'] = pd.to_datetime(df['data'], format='mixed', dayfirst=True, errors='coerce')
+        invalid = df.index[df['data'].isnull()]
+        if len(invalid):
+            raise ValueError(f"Erro: A coluna 'data' contém formatos de data inválidos que não puderam ser lidos ({describe(invalid)}).")
+        return df
+
+    # --- FUNÇÕES AUXILIARES PARA LER XML ---
+    def _xml_mapping(self, mapping):
+        """Aceita um XmlMapping, o caminho de um JSON de mapeamento ou None (formato do ofx_to_xml)."""
+        if mapping is None:
+            return OFX_XML_MAPPING
+        if isinstance(mapping, XmlMapping):
+            return mapping
+        return XmlMapping.from_json(mapping)
+
+    def _iter_xml_chunks(self, input_path, mapping):
+        """Lê os registros do XML em DataFrames de até OFX_CHUNK_SIZE linhas (índice contínuo)."""
+        import pandas as pd
+
+        count = 0
+        with open(input_path, 'rb') as f:
+            total = os.fstat(f.fileno()).st_size
+            for chunk in _chunked(iter_xml_records(f, mapping), OFX_CHUNK_SIZE):
+                yield pd.DataFrame(chunk, columns=mapping.columns, index=pd.RangeIndex(count, count + len(chunk)))
+                count += len(chunk)
+                self._report_progress(f.tell(), total)
+        if not count:
+            raise ValueError(f"Erro: nenhum registro encontrado no XML em '{mapping.record}' (verifique o mapeamento).")
+
+
+# --- LEITORES: arquivo de origem -> blocos de um tipo intermediário ---
+# 'transacoes': DataFrames com data (datetime), descricao, valor e, se houver, id
+# 'tabela': DataFrames com as colunas do arquivo, como texto
+# 'paginas': (índice da página, bytes JPEG)
+# 'imagens': (caminho, (largura, altura, componentes), bytes JPEG ou None)
+
+@reader('ofx', 'transacoes')
+def read_ofx(converter, input_path):
+    import pandas as pd
+
+    def chunks():
+        count = 0
+        for chunk in _chunked(converter._iter_ofx_transactions(input_path), OFX_CHUNK_SIZE):
+            yield pd.DataFrame({
+                'data': pd.to_datetime([t.date for t in chunk], errors='coerce'),
+                'descricao': [t.memo for t in chunk],
+                'valor': [t.amount for t in chunk],
+                'id': [t.id for t in chunk],
+            }, index=pd.RangeIndex(count, count + len(chunk)))
+            count += len(chunk)
+    return Stream('transacoes', chunks(), title="Extrato OFX")
+
+
+@reader('csv', 'tabela')
+def read_csv(converter, input_path):
+    # Detectado antes da leitura: a validação precisa do separador decimal e do formato das datas
+    dialect = sniff_csv(input_path, converter.csv_chunk_bytes)
+    return Stream('tabela', converter._iter_csv(input_path, dialect), title="Relatório CSV", decimal=dialect.decimal,
+                  date_format=dialect.date_format, describe=describe_rows, missing_columns="Erro: O CSV precisa ter as colunas 'data', 'descricao' e 'valor'.")
+
+
+@reader('xml', 'tabela', options=('mapping',))
+def read_xml(converter, input_path, mapping=None):
+    mapping = converter._xml_mapping(mapping)
+    return Stream('tabela', converter._iter_xml_chunks(input_path, mapping), title="Relatório XML", columns=mapping.columns,
+                  decimal=mapping.decimal, date_format=mapping.date_format, describe=describe_records,
+                  missing_columns="Erro: O mapeamento XML precisa ter os campos 'data', 'descricao' e 'valor'.")
+
+
+@reader('pdf', 'paginas', options=('dpi', 'quality', 'pages', 'colorspace'))
+def read_pdf(converter, input_path, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY, pages=None, colorspace='rgb'):
+    """Páginas renderizadas em paralelo, em ordem (ver raster.iter_pdf_pages)."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(input_path) as doc:
+        page_count = len(doc)
+
+    def chunks():
+        pages_iter = iter_pdf_pages(input_path, dpi, quality, pages, colorspace, converter.render_workers)
+        for done, page in enumerate(pages_iter, 1):
+            yield page
+            converter._report_progress(done, page_count)
+    return Stream('paginas', chunks())
+
+
+@reader('jpg', 'imagens')
+def read_images(converter, input_path):
+    """`input_path` pode ser um arquivo, um diretório ou uma lista de arquivos."""
+    paths = list_images(input_path)
+    if not paths:
+        raise ValueError("Nenhuma imagem encontrada para montar o PDF.")
+
+    def chunks():
+        recoded = 0
+        for done, image in enumerate(iter_prepared_images(paths, converter.render_workers), 1):
+            # Com os bytes prontos, a imagem precisou ser recodificada
+            recoded += image[2] is not None
+            yield image
+            converter._report_progress(done, len(paths))
+        if recoded:
+            converter._note_fallback(f"{recoded} de {len(paths)} imagens recodificadas (não eram JPEG baseline)")
+    return Stream('imagens', chunks())
+
+
+# --- ADAPTADORES ---
+
+@adapter('tabela', 'transacoes')
+class TableToTransactions(Adapter):
+    """Valida 'data' e 'valor' de uma tabela (CSV, XML) e a trata como transações."""
+    REQUIRED = ['data', 'descricao', 'valor']
+    stage = "validação"
+
+    def __init__(self, converter, meta):
+        super().__init__(converter, meta)
+        columns = meta.get('columns')
+        if columns is not None and not all(col in columns for col in self.REQUIRED):
+            raise ValueError(meta['missing_columns'])
+
+    def transform(self, chunk):
+        if not all(col in chunk.columns for col in self.REQUIRED):
+            raise ValueError(self.meta['missing_columns'])
+        # Cópia rasa: o bloco original pode ir também para outros escritores
+        return self.converter._validate_transactions(chunk.copy(deep=False), self.meta['decimal'],
+                                                     self.meta['date_format'], self.meta['describe'])
+
+
+# --- ESCRITORES: blocos de um tipo intermediário -> arquivo de destino ---
+
+def _amount_text(value):
+    """Valores do OFX (Decimal) saem como vieram; os do CSV (float) com duas casas."""
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+@writer('transacoes', 'csv')
+class TransactionCsvWriter(Writer):
+    """
+    data;descricao;valor;id já validados. Não há escritor de 'tabela' para CSV:
+    o XML passa pela mesma validação do xml_to_ofx antes de virar CSV.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.header = True
+
+    def write(self, chunk):
+        import pandas as pd
+
+        pd.DataFrame({'data': chunk['data'].dt.strftime('%Y-%m-%d'), 'descricao': chunk['descricao'],
+                      'valor': chunk['valor'], 'id': chunk['id'] if 'id' in chunk else None}
+                     ).to_csv(self.sink, index=False, sep=';', decimal=',', header=self.header)
+        self.header = False
+
+    def finish(self):
+        if self.header:
+            # Extrato sem transações: mesmo resultado de um DataFrame vazio
+            import pandas as pd
+            self.sink.write(pd.DataFrame([]).to_csv(index=False, sep=';', decimal=','))
+
+
+@writer('transacoes', 'ofx')
+class TransactionOfxWriter(Writer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from ofx_writer import OfxWriter
+        self.ofx = OfxWriter(self.sink)
+
+    def write(self, chunk):
+        self.ofx.write(chunk)
+
+    def finish(self):
+        self.ofx.close()
+
+
+@writer('transacoes', 'xml')
+class TransactionXmlWriter(Writer):
+    """Cada <Transacao> é escrita assim que chega; nada do documento fica em memória."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.xml = XmlRecordWriter(self.sink, "ExtratoOFX")
+
+    def write(self, chunk):
+        dates = chunk['data'].dt.strftime('%Y-%m-%d').fillna('')
+        memos = chunk['descricao'].fillna('').astype(str)
+        ids = chunk['id'] if 'id' in chunk else [None] * len(chunk)
+        for date, memo, value, fitid in zip(dates, memos, chunk['valor'], ids):
+            self.xml.write_record("Transacao", [("Data", date), ("Descricao", memo), ("Valor", _amount_text(value)), ("ID", fitid)])
+
+    def finish(self):
+        self.xml.close()
+
+
+class _ReportWriter(Writer):
+    """Relatório em PDF desenhado página por página (report.PdfReport)."""
+    binary = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.report = None
+
+    def _start_report(self, columns, total_column=None, decimal=None):
+        from report import PdfReport
+        self.report = PdfReport(self.sink, self.meta['title'], columns, total_column, decimal)
+
+    def finish(self):
+        if self.report is None:
+            self._start_report([])
+        self.report.close()
+
+
+@writer('transacoes', 'pdf')
+class TransactionPdfWriter(_ReportWriter):
+    def write(self, chunk):
+        if self.report is None:
+            self._start_report(['Data', 'Descrição', 'Valor'], total_column='Valor', decimal='.')
+        dates = chunk['data'].dt.strftime('%d/%m/%Y').fillna('')
+        self.report.add_rows([[date, memo, f"{value:.2f}"] for date, memo, value in zip(dates, chunk['descricao'], chunk['valor'])])
+
+
+@writer('tabela', 'pdf')
+class TablePdfWriter(_ReportWriter):
+    def write(self, chunk):
+        if self.report is None:
+            columns = [str(col) for col in chunk.columns]
+            # Soma a coluna 'valor' no rodapé, se existir
+            total_column = next((col for col in columns if col.strip().lower() == 'valor'), None)
+            # Mesmo separador decimal detectado no CSV (ou informado no mapeamento do XML)
+            self._start_report(columns, total_column, self.meta.get('decimal'))
+        self.report.add_rows(chunk.fillna('').values.tolist())
+
+
+@writer('paginas', 'jpg')
+class PageJpegWriter(Writer):
+    """
+    Com `output_path`, cada página é gravada assim que fica pronta
+    (<nome>_pagina_N.jpg); em memória, devolve a lista de bytes das páginas.
+    """
+
+    def __init__(self, converter, meta, output_path=None):
+        self.converter = converter
+        self.meta = meta
+        self.output_path = output_path
+        self.results = []
+
+    def write(self, chunk):
+        number, jpeg_bytes = chunk
+        if self.output_path:
+            page_path = page_output_path(self.output_path, number + 1)
+            with open(page_path, 'wb') as f: f.write(jpeg_bytes)
+            self.results.append(page_path)
+        else:
+            self.results.append(jpeg_bytes)
+
+    def close(self):
+        if not self.results: raise ValueError("Não foi possível extrair imagens do PDF.")
+        return self.results
+
+    def abort(self):
+        for page_path in self.results if self.output_path else []:
+            try:
+                os.remove(page_path)
+            except OSError:
+                pass
+
+
+@writer('imagens', 'pdf')
+class ImagePdfWriter(Writer):
+    """Uma página por imagem; JPEGs baseline são embutidos sem recodificar."""
+    binary = True
+    options = ('resolution',)
+
+    def __init__(self, converter, meta, output_path=None, resolution=DEFAULT_RESOLUTION):
+        super().__init__(converter, meta, output_path)
+        self.pdf = PdfImageWriter(self.sink, resolution)
+
+    def write(self, chunk):
+        path, (width, height, components), data = chunk
+        self.pdf.add_jpeg(width, height, components, data=data, path=None if data is not None else path)
+
+    def finish(self):
+        self.pdf.close()
@@ -0,0 +1,236 @@
+"""
+Leitura de CSV em blocos, com memória limitada.
+
+O encoding, o separador das colunas, o decimal da coluna 'valor' e o formato
+da coluna 'data' são detectados uma única vez, a partir de uma amostra do
+início do arquivo, e o arquivo é lido numa só passada em blocos de linhas
+cujo tamanho é calculado a partir de um orçamento de memória. Com o pyarrow
+instalado a leitura usa o leitor em streaming dele; sem ele, o pandas com
+`chunksize`. Todas as colunas são lidas como texto e interpretadas com o que
+foi detectado na amostra, então o resultado não depende de como o arquivo foi
+dividido em blocos.
+"""
+import codecs
+import csv
+import importlib.util
+import io
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from ofx_stream import DECODE_FALLBACK
+
+# pandas e pyarrow só são importados na primeira leitura (ver startup.py)
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+SAMPLE_SIZE = 64 * 1024
+# Orçamento de memória de cada bloco de linhas já convertido em DataFrame
+CHUNK_MEMORY_BYTES = 32 * 1024 * 1024
+# Custo aproximado de cada célula como objeto str do Python, além do texto
+CELL_OVERHEAD_BYTES = 60
+MIN_CHUNK_ROWS = 1000
+DELIMITERS = (';', ',', '\t', '|')
+# Quantas linhas inválidas são listadas nas mensagens de erro
+MAX_REPORTED_ROWS = 10
+
+# Valor terminado num separador seguido de 1 ou 2 dígitos: esse é o separador decimal
+DECIMAL_PATTERN = re.compile(r'\d([.,])\d{1,2}$')
+
+# Formatos da coluna 'data' reconhecidos na amostra, na ordem de preferência
+# (o dia vem antes do mês, exceto no ISO, que é o que o ofx_to_csv grava)
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d',
+                '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+# Mensagem do pandas para uma linha com colunas a mais
+FIELDS_ERROR_PATTERN = re.compile(r'Expected (\d+) fields in line (\d+), saw (\d+)')
+
+CsvDialect = namedtuple('CsvDialect', ['encoding', 'sep', 'decimal', 'date_format', 'columns', 'rows_per_chunk', 'bytes_per_chunk'])
+
+
+def _sniff_decimal(values, sep):
+    """
+    Separador decimal da coluna 'valor', pelos valores da amostra. Sem
+    nenhum valor com casas decimais, vale a vírgula, a não ser que ela
+    separe as colunas.
+    """
+    default = '.' if sep == ',' else ','
+    counts = {'.': 0, ',': 0}
+    for value in values:
+        match = DECIMAL_PATTERN.search(value)
+        if match:
+            counts[match.group(1)] += 1
+    if counts['.'] == counts[',']:
+        return default
+    return '.' if counts['.'] > counts[','] else ','
+
+
+def _column_sample(lines, sep, columns, name):
+    """Valores não vazios da coluna `name` nas linhas da amostra."""
+    if name not in columns:
+        return []
+    position = columns.index(name)
+    return [row[position].strip() for row in csv.reader(lines, delimiter=sep) if len(row) > position and row[position].strip()]
+
+
+def _sniff_date_format(values):
+    """
+    Primeiro formato de DATE_FORMATS que lê todas as datas da amostra, ou None.
+    Assim todos os blocos usam o mesmo formato, em vez de o pandas deduzir um
+    a partir da primeira data de cada bloco.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        if values:
+            return date_format
+    return None
+
+
+def sniff_csv(input_path, memory_budget=CHUNK_MEMORY_BYTES):
+    """Detecta encoding, separadores (colunas e decimal), formato das datas e tamanho dos blocos olhando só o começo do arquivo."""
+    with open(input_path, 'rb') as f:
+        sample = f.read(SAMPLE_SIZE)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+
+    text = sample.decode(encoding, errors=DECODE_FALLBACK)
+    lines = text.splitlines()
+    header_line = lines[0] if lines else ''
+    # O cabeçalho quase nunca tem vírgula decimal: o separador é o mais frequente nele
+    sep = max(DELIMITERS, key=header_line.count) if header_line else ';'
+    if not header_line.count(sep):
+        sep = ';'
+    columns = next(csv.reader([header_line], delimiter=sep), [])
+    # Numa amostra cheia a última linha pode ter sido cortada no meio
+    rows = lines[1:-1] if len(sample) == SAMPLE_SIZE else lines[1:]
+    decimal = _sniff_decimal(_column_sample(rows, sep, columns, 'valor'), sep)
+    date_format = _sniff_date_format(_column_sample(rows, sep, columns, 'data'))
+
+    line_count = max(sample.count(b'\n'), 1)
+    avg_line = max(len(sample) / line_count, 1)
+    row_cost = avg_line + CELL_OVERHEAD_BYTES * max(len(columns), 1)
+    rows_per_chunk = max(int(memory_budget // row_cost), MIN_CHUNK_ROWS)
+    return CsvDialect(encoding, sep, decimal, date_format, columns, rows_per_chunk, int(rows_per_chunk * avg_line))
+
+
+class _Utf8Recoder(io.RawIOBase):
+    """Entrega o arquivo como UTF-8 para o pyarrow, com o mesmo fallback do pandas."""
+
+    def __init__(self, f, encoding):
+        self._f = f
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=DECODE_FALLBACK)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            raw = self._f.read(max(size, SAMPLE_SIZE))
+            self._pending += self._decoder.decode(raw, final=not raw).encode('utf-8')
+            if not raw:
+                break
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _iter_pyarrow(f, dialect, on_fallback=None):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    read_options = pacsv.ReadOptions(block_size=max(dialect.bytes_per_chunk, 1024 * 1024))
+    parse_options = pacsv.ParseOptions(delimiter=dialect.sep)
+    convert_options = pacsv.ConvertOptions(column_types={name: pa.string() for name in dialect.columns}, strings_can_be_null=True)
+    offset = 0
+    try:
+        reader = pacsv.open_csv(_Utf8Recoder(f, dialect.encoding), read_options=read_options,
+                                parse_options=parse_options, convert_options=convert_options)
+        for batch in reader:
+            df = batch.to_pandas()
+            # Numeração contínua entre blocos, como no chunksize do pandas
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+        return
+    except pa.ArrowInvalid as e:
+        error = e
+
+    # O pyarrow recusa linhas com colunas faltando (e quebras de linha entre
+    # aspas), que o pandas aceita: o arquivo segue pelo pandas, a partir do
+    # primeiro registro ainda não entregue, para dar o mesmo resultado
+    if on_fallback is not None:
+        on_fallback(f"CSV com linhas irregulares, lido com o pandas a partir do registro {offset + 1} ({error})")
+    f.seek(0)
+    for chunk in _iter_pandas(f, dialect):
+        if chunk.index[-1] >= offset:
+            yield chunk.loc[offset:]
+
+
+def _iter_pandas(f, dialect):
+    import pandas as pd
+
+    try:
+        yield from pd.read_csv(f, sep=dialect.sep, encoding=dialect.encoding, encoding_errors=DECODE_FALLBACK,
+                               dtype=str, chunksize=dialect.rows_per_chunk)
+    except pd.errors.ParserError as e:
+        match = FIELDS_ERROR_PATTERN.search(str(e))
+        if match is None:
+            raise ValueError(f"Erro: Não foi possível ler o CSV ({e}).") from e
+        expected, line, found = match.groups()
+        raise ValueError(f"Erro: A linha {line} do CSV tem {found} colunas, mas o cabeçalho tem {expected}.") from e
+
+
+def iter_csv_chunks(input_path, memory_budget=CHUNK_MEMORY_BYTES, progress=None, on_fallback=None, dialect=None):
+    """
+    Lê o CSV em DataFrames de texto, bloco a bloco.
+
+    O índice é contínuo entre os blocos (0, 1, 2...), então a linha do arquivo
+    de cada registro é `índice + 2` (o cabeçalho é a linha 1).
+    `progress(bytes_lidos, total)` é chamada depois de cada bloco e
+    `on_fallback(mensagem)` quando a leitura toma um caminho alternativo.
+    `dialect` é o resultado de sniff_csv, se ele já foi chamado.
+    """
+    if dialect is None:
+        dialect = sniff_csv(input_path, memory_budget)
+    if on_fallback is not None:
+        if dialect.encoding == 'latin-1':
+            on_fallback("o CSV não é UTF-8 válido: lido como latin-1")
+        if not HAS_PYARROW:
+            on_fallback("pyarrow não instalado: CSV lido com o pandas, sem streaming")
+    total = os.path.getsize(input_path)
+    with open(input_path, 'rb') as f:
+        chunks = _iter_pyarrow(f, dialect, on_fallback) if HAS_PYARROW else _iter_pandas(f, dialect)
+        for chunk in chunks:
+            yield chunk
+            if progress is not None:
+                progress(f.tell(), total)
+
+
+def describe_rows(index, offset=2, noun="linha"):
+    """
+    Formata os índices de linhas inválidas como números de linha do arquivo
+    (o índice 0 é a linha 2, logo depois do cabeçalho).
+    """
+    lines = [str(i + offset) for i in index[:MAX_REPORTED_ROWS]]
+    text = ", ".join(lines)
+    if len(index) > MAX_REPORTED_ROWS:
+        text += f" e mais {len(index) - MAX_REPORTED_ROWS}"
+    return f"{noun} {text}" if len(index) == 1 else f"{noun}s {text}"
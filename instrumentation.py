@@ -0,0 +1,207 @@
+"""
+Medição opcional das etapas de uma conversão.
+
+Com `Converter.instrumentation` apontando para um Instrumentation, cada
+etapa do caminho de conversão (leitura e decodificação da entrada,
+validação, desenho/serialização da saída, gravação) registra o tempo gasto,
+os bytes lidos e gravados, quantas linhas ou páginas passaram por ela e o
+pico de memória do processo. Os caminhos alternativos tomados (encoding
+corrigido, leitor de CSV sem pyarrow, imagens recodificadas, extrato vindo
+do cache) ficam anotados como observações.
+
+O resultado aparece no log da janela e pode ser exportado como JSON ou no
+formato de trace do Chrome (abra em chrome://tracing ou ui.perfetto.dev).
+Sem instrumentação nada disso é calculado.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Acima disso os intervalos individuais deixam de ir para o trace (os totais continuam)
+MAX_TRACE_EVENTS = 20000
+
+
+def peak_rss_mb(children=False):
+    """Pico de memória residente deste processo (ou dos filhos já encerrados), em MB."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: só o do próprio processo
+        return None if children else _windows_peak_rss_mb()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # KB no Linux, bytes no macOS
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _windows_peak_rss_mb():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+
+
+def output_size(result):
+    """Bytes de um resultado de conversão: lista de arquivos gravados, str, bytes ou lista de bytes."""
+    if isinstance(result, (list, tuple)):
+        return sum(os.path.getsize(item) if isinstance(item, str) else len(item) for item in result)
+    if isinstance(result, str):
+        return len(result.encode('utf-8'))
+    return len(result)
+
+
+def _format_bytes(size):
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+class Stage:
+    """Totais de uma etapa, somados entre todos os blocos que passaram por ela."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.items = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.peak_rss_mb = None
+
+    def to_dict(self):
+        return {
+            'etapa': self.name,
+            'segundos': round(self.seconds, 4),
+            'chamadas': self.calls,
+            'itens': self.items,
+            'bytes_entrada': self.bytes_in,
+            'bytes_saida': self.bytes_out,
+            'pico_rss_mb': self.peak_rss_mb,
+        }
+
+
+class Instrumentation:
+    """Medições de uma conversão (ou de várias, em sequência)."""
+
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.notes = []
+        self._events = []
+        self._origin = time.perf_counter()
+
+    def stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(name)
+        return stage
+
+    def _record(self, stage, start, items=0, bytes_in=0, bytes_out=0):
+        end = time.perf_counter()
+        stage.seconds += end - start
+        stage.calls += 1
+        stage.items += items
+        stage.bytes_in += bytes_in
+        stage.bytes_out += bytes_out
+        # O pico do processo só cresce: o valor no fim da etapa é o maior visto até ali
+        stage.peak_rss_mb = peak_rss_mb()
+        if len(self._events) < MAX_TRACE_EVENTS:
+            self._events.append((stage.name, start, end, threading.get_ident()))
+
+    @contextmanager
+    def measure(self, name, items=0, bytes_in=0):
+        """Mede o bloco `with` como uma passagem pela etapa `name`."""
+        start = time.perf_counter()
+        counts = {'bytes_out': 0}
+        try:
+            yield counts
+        finally:
+            self._record(self.stage(name), start, items, bytes_in, counts['bytes_out'])
+
+    def iter_measured(self, name, iterable, count_items=None):
+        """
+        Repassa os itens de `iterable` medindo o tempo gasto para produzir cada
+        um (ex.: a leitura e decodificação da entrada, feitas sob demanda).
+        """
+        stage = self.stage(name)
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self._record(stage, start)
+                    return
+                self._record(stage, start, count_items(item) if count_items else 1)
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def note(self, message):
+        """Registra um caminho alternativo tomado durante a conversão."""
+        if message not in self.notes:
+            self.notes.append(message)
+            if len(self._events) < MAX_TRACE_EVENTS:
+                self._events.append((message, time.perf_counter(), None, threading.get_ident()))
+
+    # --- Saídas ---
+
+    def to_dict(self):
+        return {
+            'etapas': [stage.to_dict() for stage in self.stages.values()],
+            'observacoes': list(self.notes),
+        }
+
+    def summary_lines(self):
+        """Uma linha por etapa e por observação, para o log da janela."""
+        lines = []
+        for stage in self.stages.values():
+            parts = [f"{stage.seconds:.2f} s"]
+            if stage.items:
+                parts.append(f"{stage.items} itens")
+            if stage.bytes_in:
+                parts.append(f"{_format_bytes(stage.bytes_in)} lidos")
+            if stage.bytes_out:
+                parts.append(f"{_format_bytes(stage.bytes_out)} gravados")
+            if stage.peak_rss_mb is not None:
+                parts.append(f"pico de memória {stage.peak_rss_mb:.0f} MB")
+            lines.append(f"Etapa {stage.name}: {', '.join(parts)}")
+        lines.extend(f"Observação: {note}" for note in self.notes)
+        return lines
+
+    def chrome_trace(self):
+        """Eventos no formato Trace Event do Chrome (tempos em microssegundos)."""
+        pid = os.getpid()
+        events = []
+        for name, start, end, thread in self._events:
+            event = {'name': name, 'cat': 'conversao', 'ts': round((start - self._origin) * 1e6, 1), 'pid': pid, 'tid': thread}
+            if end is None:
+                event.update(ph='i', s='t')
+            else:
+                event.update(ph='X', dur=round((end - start) * 1e6, 1))
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.to_dict()}
+
+    def export(self, path):
+        """Grava as medições em `path`: trace do Chrome se terminar em '.trace.json', senão JSON."""
+        data = self.chrome_trace() if path.lower().endswith('.trace.json') else self.to_dict()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,179 @@
+"""
+Execução de tarefas em segundo plano para a interface gráfica.
+
+As conversões rodam em threads de um pool e nunca tocam nos widgets: tudo o
+que precisa chegar à interface (progresso, resultado, páginas renderizadas) é
+colocado em uma fila que a thread do Tk esvazia periodicamente via `after()`.
+O cancelamento é cooperativo: a função `report` entregue à tarefa lança
+JobCancelled na próxima vez em que é chamada depois do pedido de cancelamento.
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+POLL_INTERVAL_MS = 50
+# Intervalo mínimo entre duas atualizações de progresso enviadas à interface
+PROGRESS_INTERVAL = 0.1
+
+QUEUED = "na fila"
+RUNNING = "em andamento"
+DONE = "concluída"
+FAILED = "erro"
+CANCELLED = "cancelada"
+
+
+class JobCancelled(Exception):
+    """Lançada dentro da tarefa quando o usuário cancela a execução."""
+
+
+class Job:
+    def __init__(self, job_id, description):
+        self.id = job_id
+        self.description = description
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._future = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def cancel(self):
+        """Pede o cancelamento; tarefas ainda na fila nem chegam a começar."""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def wait(self):
+        """Espera a tarefa terminar (uma cancelada desiste na próxima chamada de `report`)."""
+        if self._future is not None:
+            wait([self._future])
+
+
+def cancel_and_wait(jobs):
+    """
+    Cancela `jobs` e espera todos terminarem, ex.: antes de fechar um arquivo
+    que eles ainda podem estar lendo.
+    """
+    jobs = [job for job in jobs if not job.finished]
+    for job in jobs:
+        job.cancel()
+    for job in jobs:
+        job.wait()
+
+
+class JobManager:
+    def __init__(self, widget, max_workers=2):
+        self.widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="conversao")
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._closed = False
+        self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def post(self, callback, *args):
+        """Agenda `callback(*args)` na thread do Tk. Pode ser chamada de qualquer thread."""
+        self._queue.put((callback, args))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Erro ao atualizar a interface: {e}")
+        if not self._closed:
+            try:
+                self.widget.after(POLL_INTERVAL_MS, self._poll)
+            except Exception:
+                # A janela foi destruída
+                self._closed = True
+
+    def submit(self, description, work, on_update=None):
+        """
+        Enfileira `work(report)` e devolve o Job correspondente.
+
+        `report(done, total)` deve ser chamada pela tarefa de tempos em tempos:
+        atualiza o progresso e interrompe a tarefa se ela tiver sido cancelada.
+        `on_update(job)` é chamada na thread do Tk a cada mudança de estado.
+        Depois de shutdown() nada mais é executado: o Job volta já cancelado.
+        """
+        job = Job(next(self._ids), description)
+        if self._closed:
+            job.cancel()
+            job.status = CANCELLED
+            return job
+        self._jobs[job.id] = job
+        last_post = [0.0]
+
+        def notify():
+            if on_update:
+                self.post(on_update, job)
+
+        def report(done, total):
+            job.check_cancelled()
+            if total:
+                job.progress = min(done / total, 1.0)
+            now = time.perf_counter()
+            if now - last_post[0] >= PROGRESS_INTERVAL:
+                last_post[0] = now
+                notify()
+
+        def run():
+            if job.cancelled:
+                job.status = CANCELLED
+                notify()
+                return
+            job.status = RUNNING
+            job.started_at = time.perf_counter()
+            notify()
+            try:
+                job.result = work(report)
+                job.progress = 1.0
+                job.status = DONE
+            except JobCancelled:
+                job.status = CANCELLED
+            except Exception as e:
+                job.error = e
+                job.status = FAILED
+            finally:
+                job.finished_at = time.perf_counter()
+                self._jobs.pop(job.id, None)
+            notify()
+
+        job._future = self._executor.submit(run)
+        notify()
+        return job
+
+    def active_jobs(self):
+        return [job for job in self._jobs.values() if not job.finished]
+
+    def shutdown(self):
+        """Cancela tudo o que estiver na fila ou em andamento e libera o pool."""
+        self._closed = True
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
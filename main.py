@@ -2,12 +2,15 @@ from datetime import datetime
 import customtkinter
 from tkinter import filedialog
 from converter import Converter
+from conversions import can_convert
+from jobs import JobManager, DONE, FAILED, CANCELLED
+from cache import ConversionCache, ParsedCache
+from instrumentation import Instrumentation
+from spool import OutputSpool, save_output
+from startup import prewarm
 import os
-import io
-from PIL import Image, ImageTk
-import fitz  # PyMuPDF
 import threading
-import requests
+import multiprocessing
 import webbrowser
 import json
 
@@ -19,13 +22,45 @@ URL_VERSAO = "https://gist.githubusercontent.com/MuriloAEFV/e8f38e34d14ec3224c47
 customtkinter.set_appearance_mode("System")
 customtkinter.set_default_color_theme("blue")
 
+# Tempo que uma conversão terminada continua visível na lista
+JOB_ROW_LINGER_MS = 8000
+# Espera depois da abertura antes de pré-carregar as bibliotecas (None desativa)
+PREWARM_DELAY_MS = 500
+
+
+# --- Linha da lista de conversões ---
+class JobRow(customtkinter.CTkFrame):
+    def __init__(self, master, job):
+        super().__init__(master)
+        self.job = job
+        self.grid_columnconfigure(0, weight=1)
+
+        self.label = customtkinter.CTkLabel(self, text="", anchor="w")
+        self.label.grid(row=0, column=0, padx=5, sticky="ew")
+        self.progressbar = customtkinter.CTkProgressBar(self, width=140)
+        self.progressbar.grid(row=0, column=1, padx=5)
+        self.cancel_button = customtkinter.CTkButton(self, text="Cancelar", width=80, command=self.cancel)
+        self.cancel_button.grid(row=0, column=2, padx=5)
+        self.refresh()
+
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_button.configure(state="disabled")
+
+    def refresh(self):
+        self.label.configure(text=f"{self.job.description} — {self.job.status}")
+        self.progressbar.set(self.job.progress)
+        if self.job.finished:
+            self.cancel_button.configure(state="disabled")
+
 
 # --- Janela de Visualização ---
 class PreviewWindow(customtkinter.CTkToplevel):
-    def __init__(self, parent, data, file_format):
+    def __init__(self, parent, paths, file_format):
         super().__init__(parent)
         self.parent = parent
-        self.data = data
+        # Arquivos do resultado, na pasta temporária (várias páginas no caso de JPG)
+        self.paths = paths
         self.file_format = file_format
         
         self.title(f"Visualização - {file_format.upper()}")
@@ -48,80 +83,80 @@ class PreviewWindow(customtkinter.CTkToplevel):
 
     def display_content(self):
         if self.file_format in ['csv', 'xml', 'ofx']:
-            # --- PREVENÇÃO DE TRAVAMENTO POR ARQUIVO GRANDE ---
-            # Limite de 5MB para preview de texto
-            MAX_PREVIEW_SIZE = 5 * 1024 * 1024 
-            
-            if isinstance(self.data, str) and len(self.data) > MAX_PREVIEW_SIZE:
-                # Cria um frame centralizado para o aviso
-                center_frame = customtkinter.CTkFrame(self)
-                center_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-                center_frame.grid_rowconfigure(0, weight=1)
-                center_frame.grid_columnconfigure(0, weight=1)
-                
-                label = customtkinter.CTkLabel(center_frame, text=f"Arquivo muito grande para visualização ({len(self.data) / (1024*1024):.1f} MB).\n\nUse o botão 'Fazer Download'.", text_color="orange", font=("", 14))
-                label.grid(row=0, column=0, sticky="nsew")
-            else:
-                textbox = customtkinter.CTkTextbox(self)
-                textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-                textbox.insert("0.0", self.data)
-                textbox.configure(state="disabled")
-
-        elif self.file_format == 'jpg':
+            # --- TEXTO DE QUALQUER TAMANHO ---
+            # O arquivo é mapeado em memória e só as linhas visíveis são lidas;
+            # o índice das linhas é montado em segundo plano.
+            from preview import PagedTextView, TextLineIndex
             try:
-                # --- LÓGICA MELHORADA PARA MÚLTIPLAS PÁGINAS ---
-                scrollable_frame = customtkinter.CTkScrollableFrame(self)
-                scrollable_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-                
-                # Verifica se 'data' é uma lista (de pdf_to_jpg) ou um único item
-                image_list = self.data if isinstance(self.data, list) else [self.data]
-
-                for image_bytes in image_list:
-                    pil_image = Image.open(io.BytesIO(image_bytes))
-                    ctk_image = customtkinter.CTkImage(light_image=pil_image, dark_image=pil_image, size=pil_image.size)
-                    
-                    image_label = customtkinter.CTkLabel(scrollable_frame, image=ctk_image, text="")
-                    image_label.pack(pady=10, padx=10, expand=True)
-
-            except Exception as e:
-                self.parent.log(f"Erro ao exibir imagem: {e}")
-
-        elif self.file_format == 'pdf':
+                index = TextLineIndex(self.paths[0])
+            except (OSError, ValueError) as e:
+                self.parent.log(f"Erro ao abrir o resultado: {e}")
+                return
+
+            self.render_status = customtkinter.CTkLabel(self.button_frame, text="")
+            self.render_status.pack(side="left", padx=5)
+            text_view = PagedTextView(self, index, self.parent.preview_jobs,
+                                      on_status=lambda text: self.render_status.configure(text=text),
+                                      on_error=lambda e: self.parent.log(f"Erro na busca: {e}"))
+            text_view.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        elif self.file_format in ('jpg', 'pdf'):
+            # --- LÓGICA MELHORADA PARA MÚLTIPLAS PÁGINAS ---
+            # Só as páginas próximas da área visível são renderizadas (em segundo
+            # plano, no tamanho de exibição), então documentos enormes abrem na hora.
+            from preview import PagedImageView, PdfPageSource, JpegPageSource
+            what = "imagem" if self.file_format == 'jpg' else "preview do PDF"
             try:
-                pdf_doc = fitz.open(stream=self.data, filetype="pdf")
-                scrollable_frame = customtkinter.CTkScrollableFrame(self)
-                scrollable_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-                
-                for page_num in range(len(pdf_doc)):
-                    page = pdf_doc.load_page(page_num)
-                    pix = page.get_pixmap()
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    
-                    ctk_image = customtkinter.CTkImage(light_image=img, dark_image=img, size=img.size)
-                    page_label = customtkinter.CTkLabel(scrollable_frame, image=ctk_image, text="")
-                    page_label.pack(pady=10, padx=10)
-                
-                pdf_doc.close()
+                if self.file_format == 'jpg':
+                    source = JpegPageSource(self.paths)
+                else:
+                    source = PdfPageSource(self.paths[0])
             except Exception as e:
-                self.parent.log(f"Erro ao renderizar preview do PDF: {e}")
+                self.parent.log(f"Erro ao renderizar {what}: {e}")
+                return
+
+            self.render_status = customtkinter.CTkLabel(self.button_frame, text="")
+            self.render_status.pack(side="left", padx=5)
+            page_view = PagedImageView(self, source, self.parent.preview_jobs,
+                                       on_status=lambda text: self.render_status.configure(text=text),
+                                       on_error=lambda e: self.parent.log(f"Erro ao renderizar {what}: {e}"))
+            page_view.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
     def download(self):
-        self.parent.save_converted_file(self.data, self.file_format)
+        self.parent.save_converted_file(self.paths, self.file_format)
         self.destroy()
 
+    def destroy(self):
+        # A visualização fecha o arquivo ao ser destruída; só então o que não
+        # foi salvo pode sair da pasta temporária (no Windows, um arquivo
+        # aberto ou mapeado não pode ser apagado)
+        super().destroy()
+        self.parent.spool.discard(self.paths[0])
+
 
 class App(customtkinter.CTk):
     def __init__(self):
         super().__init__()
         self.title(f"Conversor de Arquivos v{VERSAO_ATUAL}")
-        self.geometry("700x550")
-        self.converter = Converter()
+        self.geometry("700x650")
         self.input_file_path = ""
-        self.converted_data = None
-        self.to_format = ""
+
+        # Conversões e renderização do preview rodam fora da thread do Tk.
+        # Pools separados para que um preview não espere conversões na fila.
+        self.jobs = JobManager(self, max_workers=2)
+        self.preview_jobs = JobManager(self, max_workers=1)
+        # Resultados em disco (por conteúdo da entrada) e extratos OFX já lidos
+        self.cache = ConversionCache()
+        self.parsed_cache = ParsedCache()
+        # Resultados das conversões, gravados em disco até o download
+        self.spool = OutputSpool()
+        # Medições da última conversão feita com "Medir etapas" marcado
+        self.last_instrumentation = None
+        self.job_rows = {}
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(2, weight=1)
+        self.grid_rowconfigure(3, weight=1)
 
         self.file_frame = customtkinter.CTkFrame(self)
         self.file_frame.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
@@ -144,23 +179,42 @@ class App(customtkinter.CTk):
         self.to_optionmenu = customtkinter.CTkOptionMenu(self.options_frame, values=["CSV", "PDF", "XML", "OFX", "JPG"])
         self.to_optionmenu.grid(row=0, column=3, padx=10, pady=10, sticky="ew")
         self.to_optionmenu.set("CSV")
+        self.measure_checkbox = customtkinter.CTkCheckBox(self.options_frame, text="Medir etapas da conversão")
+        self.measure_checkbox.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="w")
+        self.export_button = customtkinter.CTkButton(self.options_frame, text="Exportar medições", command=self.export_measurements, state="disabled")
+        self.export_button.grid(row=1, column=2, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+
+        self.jobs_frame = customtkinter.CTkScrollableFrame(self, height=90, label_text="Conversões em andamento")
+        self.jobs_frame.grid(row=2, column=0, padx=20, pady=(20, 0), sticky="ew")
+        self.jobs_frame.grid_columnconfigure(0, weight=1)
 
         self.log_textbox = customtkinter.CTkTextbox(self, state="disabled")
-        self.log_textbox.grid(row=2, column=0, padx=20, pady=20, sticky="nsew")
+        self.log_textbox.grid(row=3, column=0, padx=20, pady=20, sticky="nsew")
         
         self.convert_button = customtkinter.CTkButton(self, text="Converter e Visualizar", command=self.run_conversion, height=40)
-        self.convert_button.grid(row=3, column=0, padx=20, pady=(10, 20), sticky="ew")
+        self.convert_button.grid(row=4, column=0, padx=20, pady=(10, 20), sticky="ew")
 
         self.log("Bem-vindo! Selecione um arquivo para começar.")
         self.check_for_updates()
+        if PREWARM_DELAY_MS is not None:
+            # Depois que a janela aparece, carrega as bibliotecas das conversões em segundo plano
+            self.after(PREWARM_DELAY_MS, prewarm)
 
     def select_file(self):
         from_format = self.from_optionmenu.get().lower()
         filetypes = {'ofx': [("Extrato OFX", "*.ofx")],'csv': [("Arquivo CSV", "*.csv")],'pdf': [("Arquivo PDF", "*.pdf")],'jpg': [("Imagem JPG", "*.jpg;*.jpeg")],'xml': [("Arquivo XML", "*.xml")],}
         current_filetypes = filetypes.get(from_format, [])
         current_filetypes.append(("Todos os arquivos", "*.*"))
-        self.input_file_path = filedialog.askopenfilename(filetypes=current_filetypes)
-        if self.input_file_path:
+        if from_format == 'jpg':
+            # Várias imagens viram um único PDF, uma página por imagem, na ordem escolhida
+            selected = list(filedialog.askopenfilenames(filetypes=current_filetypes))
+            self.input_file_path = selected[0] if len(selected) == 1 else selected
+        else:
+            self.input_file_path = filedialog.askopenfilename(filetypes=current_filetypes)
+        if isinstance(self.input_file_path, list) and self.input_file_path:
+            self.input_file_label.configure(text=f"{len(self.input_file_path)} imagens selecionadas")
+            self.log(f"{len(self.input_file_path)} imagens selecionadas em: {os.path.dirname(self.input_file_path[0])}")
+        elif self.input_file_path:
             self.input_file_label.configure(text=os.path.basename(self.input_file_path))
             self.log(f"Arquivo selecionado: {self.input_file_path}")
         else:
@@ -172,56 +226,105 @@ class App(customtkinter.CTk):
             return
 
         from_format = self.from_optionmenu.get().lower()
-        self.to_format = self.to_optionmenu.get().lower()
+        to_format = self.to_optionmenu.get().lower()
+        input_path = self.input_file_path
+
+        if not can_convert(from_format, to_format):
+            self.log(f"Erro na conversão: A conversão de {from_format.upper()} para {to_format.upper()} não é suportada.")
+            return
 
-        self.log(f"Processando conversão de {from_format.upper()} para {self.to_format.upper()}...")
-        self.update()
+        instrumentation = Instrumentation() if self.measure_checkbox.get() else None
+        output_path = self.spool.new_output(to_format)
+
+        def work(report):
+            # Um Converter por tarefa: o progresso (e o cancelamento) é por conversão
+            converter = Converter()
+            converter.on_progress = report
+            converter.parsed_cache = self.parsed_cache
+            converter.instrumentation = instrumentation
+            # O resultado é gravado direto no arquivo temporário, nunca inteiro em memória
+            convert = lambda: converter.convert(input_path, from_format, to_format, output_path)
+            if instrumentation is not None:
+                # Medindo, converte de novo mesmo que o resultado esteja no cache
+                return convert()
+            return self.cache.get_or_convert_file(f"{from_format}_to_{to_format}", input_path, {}, output_path, convert)
+
+        if isinstance(input_path, list):
+            source_name = f"{len(input_path)} imagens"
+        else:
+            source_name = os.path.basename(input_path)
+        description = f"{source_name}: {from_format.upper()} → {to_format.upper()}"
+        self.log(f"Processando conversão de {from_format.upper()} para {to_format.upper()}...")
+        job = self.jobs.submit(description, work, self.on_job_update)
+        job.to_format = to_format
+        job.instrumentation = instrumentation
+        job.output_path = output_path
+        self.job_rows[job.id] = JobRow(self.jobs_frame, job)
+        self.job_rows[job.id].grid(row=job.id, column=0, padx=5, pady=2, sticky="ew")
+
+    def on_job_update(self, job):
+        row = self.job_rows.get(job.id)
+        if row is not None:
+            row.refresh()
+        if not job.finished:
+            return
 
+        if job.instrumentation is not None and job.status in (DONE, FAILED):
+            self.log("\n".join([f"Medições de {job.description}:"] + job.instrumentation.summary_lines()))
+            self.last_instrumentation = job.instrumentation
+            self.export_button.configure(state="normal")
+
+        if job.status == DONE:
+            self.log(f"Conversão concluída em {job.elapsed:.1f}s ({job.description}). Abrindo visualização...")
+            PreviewWindow(self, job.result, job.to_format)
+        elif job.status == FAILED:
+            self.log(f"Erro na conversão: {job.error}")
+            self.spool.discard(job.output_path)
+        elif job.status == CANCELLED:
+            self.log(f"Conversão cancelada: {job.description}")
+            self.spool.discard(job.output_path)
+
+        # Remove a linha da lista alguns segundos depois de terminar
+        if row is not None:
+            self.after(JOB_ROW_LINGER_MS, self._remove_job_row, job.id)
+
+    def export_measurements(self):
+        if self.last_instrumentation is None:
+            return
+        output_path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="medicoes.json",
+                                                   filetypes=[("Medições (JSON)", "*.json"), ("Trace do Chrome", "*.trace.json")])
+        if not output_path:
+            return
         try:
-            conversion_function_name = f"{from_format}_to_{self.to_format}"
-            if not hasattr(self.converter, conversion_function_name):
-                raise NotImplementedError(f"A conversão de {from_format.upper()} para {self.to_format.upper()} não é suportada.")
-            
-            conversion_function = getattr(self.converter, conversion_function_name)
-            self.converted_data = conversion_function(self.input_file_path)
-            
-            self.log("Conversão concluída. Abrindo visualização...")
-            PreviewWindow(self, self.converted_data, self.to_format)
-
-        except (Exception, NotImplementedError) as e:
-            self.log(f"Erro na conversão: {e}")
-
-    def save_converted_file(self, data, to_format):
+            self.last_instrumentation.export(output_path)
+            self.log(f"Medições salvas em: {output_path}")
+        except OSError as e:
+            self.log(f"Erro ao salvar as medições: {e}")
+
+    def _remove_job_row(self, job_id):
+        row = self.job_rows.pop(job_id, None)
+        if row is not None:
+            row.destroy()
+
+    def on_close(self):
+        self.jobs.shutdown()
+        self.preview_jobs.shutdown()
+        # Destrói as janelas de visualização (que fecham seus arquivos) antes de apagar a pasta
+        self.destroy()
+        self.spool.cleanup()
+
+    def save_converted_file(self, paths, to_format):
         output_path = filedialog.asksaveasfilename(defaultextension=f".{to_format}", filetypes=[(f"{to_format.upper()} files", f"*.{to_format}"), ("All files", "*.*")])
         if not output_path:
             self.log("Salvamento cancelado pelo usuário."); return
 
         try:
-            if isinstance(data, list):
-                base_dir, base_name = os.path.dirname(output_path), os.path.splitext(os.path.basename(output_path))[0]
-                if to_format == 'jpg':
-                     # Se o formato de saída for JPG, salva apenas a primeira imagem no local exato
-                     with open(output_path, 'wb') as f: f.write(data[0])
-                     self.log(f"Sucesso! Imagem salva em: {output_path}")
-                     # Se houver mais imagens, avisa o usuário (embora o preview agora mostre todas)
-                     if len(data) > 1:
-                         self.log(f"Aviso: O PDF original tinha {len(data)} páginas. Apenas a primeira foi salva como '{os.path.basename(output_path)}'.")
-                         self.log(f"Para salvar todas, escolha um nome base (ex: 'pagina') e o app salvará 'pagina_1.jpg', 'pagina_2.jpg'...")
-                else:
-                    # Este caso 'else' é improvável para 'list', mas mantido por segurança
-                    for i, img_bytes in enumerate(data):
-                        page_path = os.path.join(base_dir, f"{base_name}_pagina_{i+1}.jpg")
-                        with open(page_path, 'wb') as f: f.write(img_bytes)
-                    self.log(f"Sucesso! {len(data)} páginas salvas na pasta: {base_dir}")
-            
-            elif isinstance(data, str):
-                with open(output_path, 'w', encoding='utf-8') as f: f.write(data)
+            # Move o arquivo já gravado para o destino (sem regravar o conteúdo)
+            saved = save_output(paths, output_path)
+            if len(saved) == 1:
                 self.log(f"Sucesso! Arquivo salvo em: {output_path}")
-            
-            elif isinstance(data, bytes):
-                with open(output_path, 'wb') as f: f.write(data)
-                self.log(f"Sucesso! Arquivo salvo em: {output_path}")
-        
+            else:
+                self.log(f"Sucesso! {len(saved)} páginas salvas na pasta {os.path.dirname(output_path)} ({os.path.basename(saved[0])}, {os.path.basename(saved[1])}...)")
         except Exception as e:
             self.log(f"Erro ao salvar o arquivo: {e}")
 
@@ -237,6 +340,8 @@ class App(customtkinter.CTk):
         update_thread.start()
 
     def _update_checker_thread(self):
+        # Importado aqui, fora da thread da interface, para não atrasar a abertura da janela
+        import requests
         try:
             response = requests.get(URL_VERSAO, timeout=5)
             response.raise_for_status()
@@ -277,5 +382,7 @@ class App(customtkinter.CTk):
         webbrowser.open(url)
 
 if __name__ == "__main__":
+    # Necessário no executável do PyInstaller: a rasterização de PDF usa processos
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
\ No newline at end of file
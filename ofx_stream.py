@@ -0,0 +1,234 @@
+"""
+Leitor incremental de arquivos OFX (SGML 1.x e XML 2.x).
+
+O ofxparse carrega o arquivo inteiro e monta uma árvore completa antes de
+devolver qualquer transação. Aqui o arquivo é lido em blocos, o encoding é
+detectado uma única vez a partir do início do arquivo e cada <STMTTRN> é
+entregue assim que termina, então a memória fica constante mesmo em extratos
+com milhões de lançamentos.
+"""
+import codecs
+import decimal
+import html
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# Tamanho do bloco lido do disco e do prefixo usado para detectar o encoding.
+CHUNK_SIZE = 64 * 1024
+SNIFF_SIZE = 64 * 1024
+
+OfxTransaction = namedtuple('OfxTransaction', ['date', 'memo', 'amount', 'id', 'type', 'payee'])
+
+# Uma seção CDATA ou qualquer tag (<X>, </X>, <X/>, <?X ...?>, <!X>), seguida do texto até a próxima tag.
+_TOKEN_RE = re.compile(r'<!\[CDATA\[(.*?)\]\]>([^<]*)|<([/?!]?)([^>]*)>([^<]*)', re.DOTALL)
+_CDATA_START = '<![CDATA['
+_XML_ENCODING_RE = re.compile(r'<\?xml[^>]*encoding\s*=\s*["\']([\w.:-]+)["\']', re.IGNORECASE)
+_SGML_HEADER_RE = re.compile(r'^\s*(ENCODING|CHARSET)\s*:\s*([\w.-]+)', re.IGNORECASE | re.MULTILINE)
+_TZ_RE = re.compile(r"\[(?P<tz>[-+]?\d+\.?\d*)\:\w*\]$")
+_MSEC_RE = re.compile(r"^[0-9]*\.([0-9]{0,5})")
+
+_STATEMENT_TAGS = ('STMTRS', 'CCSTMTRS')
+_SINGLE_BYTE_ENCODINGS = ('cp1252', 'iso8859-1', 'iso8859-15')
+
+
+def _latin1_fallback(error):
+    """Troca bytes que não pertencem ao encoding pelo caractere Latin-1 equivalente."""
+    bad = error.object[error.start:error.end]
+    return bytes(bad).decode('latin-1'), error.end
+
+
+# Nome do tratamento de erro de decodificação; também usado na leitura de CSV
+DECODE_FALLBACK = 'latin1-fallback'
+codecs.register_error(DECODE_FALLBACK, _latin1_fallback)
+
+
+def _normalize_encoding(name):
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def declared_encoding(prefix):
+    """Encoding declarado no cabeçalho (SGML ou XML) do OFX, ou None."""
+    head = prefix[:4096].decode('ascii', errors='replace')
+    declared = None
+    match = _XML_ENCODING_RE.search(head)
+    if match:
+        declared = _normalize_encoding(match.group(1))
+    else:
+        header = {key.upper(): value.upper() for key, value in _SGML_HEADER_RE.findall(head)}
+        charset = header.get('CHARSET', 'NONE')
+        if header.get('ENCODING', '').replace('-', '') == 'UTF8':
+            declared = 'utf-8'
+        elif charset.isdigit():
+            declared = _normalize_encoding(f"cp{charset}")
+        elif charset != 'NONE':
+            declared = _normalize_encoding(charset)
+    return declared
+
+
+def sniff_encoding(prefix):
+    """
+    Descobre o encoding real de um OFX olhando só o começo do arquivo.
+
+    Bancos costumam declarar US-ASCII ou UTF-8 e mandar Latin-1, por isso a
+    declaração do cabeçalho é conferida contra os bytes do prefixo.
+    """
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    declared = declared_encoding(prefix)
+    if declared in _SINGLE_BYTE_ENCODINGS:
+        return declared
+
+    # Declarou UTF-8/ASCII (ou nada): só confia se o prefixo for UTF-8 válido.
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def parse_ofx_datetime(value):
+    """Converte datas OFX (ex.: 20101106160000.00[-5:EST]) como o ofxparse faz."""
+    match = _TZ_RE.search(value)
+    tz_offset = timedelta(hours=float(match.group('tz'))) if match else timedelta(0)
+
+    match = _MSEC_RE.search(value)
+    msec = timedelta(seconds=float("0." + match.group(1))) if match else timedelta(0)
+
+    try:
+        return datetime.strptime(value[:14], '%Y%m%d%H%M%S') - tz_offset + msec
+    except ValueError:
+        if value[:8] == "00000000":
+            return None
+        return datetime.strptime(value[:8], '%Y%m%d') - tz_offset + msec
+
+
+def parse_ofx_amount(value):
+    """Converte valores OFX para Decimal aceitando '10.000,50', '1 025,53', '+10,5'..."""
+    if re.search(r'.*\..*,', value):
+        value = value.replace('.', '')
+    if re.search(r'.*,.*\.', value):
+        value = value.replace(',', '')
+    if '.' not in value and ',' in value:
+        value = value.replace(',', '.')
+    value = value.replace(' ', '').replace('+', '')
+    try:
+        return decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        # Alguns bancos usam transações "null" para informar mudança de juros.
+        if value in ('null', '-null'):
+            return decimal.Decimal(0)
+        raise ValueError(f"Valor de transação inválido: '{value}'")
+
+
+def _build_transaction(fields, number):
+    for tag in ('TRNAMT', 'DTPOSTED', 'FITID'):
+        if not fields.get(tag):
+            raise ValueError(f"Falha ao processar OFX: a transação {number} não tem o campo obrigatório {tag}.")
+    try:
+        date = parse_ofx_datetime(fields['DTPOSTED'])
+    except ValueError as e:
+        raise ValueError(f"Falha ao processar OFX: data inválida na transação {number} ({e}).")
+    return OfxTransaction(
+        date=date,
+        memo=fields.get('MEMO', ''),
+        amount=parse_ofx_amount(fields['TRNAMT']),
+        id=fields['FITID'],
+        type=fields.get('TRNTYPE', '').lower(),
+        payee=fields.get('NAME', ''),
+    )
+
+
+def _iter_tokens(f, encoding):
+    """
+    Gera (fechamento, TAG, texto) lendo o arquivo em blocos.
+
+    O conteúdo de uma seção CDATA (ex.: <MEMO><![CDATA[Loja <A> & B]]>) entra
+    no texto da tag anterior, escapado como o resto do texto.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors=DECODE_FALLBACK)
+    buffer = ''
+    pending = None
+    while True:
+        raw = f.read(CHUNK_SIZE)
+        buffer += decoder.decode(raw, final=not raw)
+        # Só processa até o último '<': o texto da última tag pode continuar no próximo bloco.
+        cut = len(buffer) if not raw else buffer.rfind('<')
+        if raw:
+            # Se esse '<' está dentro de uma seção CDATA, ela fica inteira para o próximo
+            cdata = buffer.rfind(_CDATA_START, 0, cut + 1)
+            if cdata != -1 and not 0 <= buffer.find(']]>', cdata) < cut:
+                cut = cdata
+        if cut > 0:
+            for match in _TOKEN_RE.finditer(buffer, 0, cut):
+                content, after, kind, name, text = match.groups()
+                if content is not None:
+                    if pending is not None:
+                        closing, name, text = pending
+                        pending = (closing, name, text + html.escape(content, quote=False) + after)
+                    continue
+                if kind in ('?', '!'):
+                    continue
+                name = name.split(None, 1)[0] if name.strip() else ''
+                closing = kind == '/'
+                if name.endswith('/'):
+                    # <MEMO/> é uma tag vazia no OFX em XML.
+                    name, text = name[:-1], ''
+                if pending is not None:
+                    yield pending
+                pending = (closing, name.upper(), text)
+            buffer = buffer[cut:]
+        if not raw:
+            if pending is not None:
+                yield pending
+            return
+
+
+def iter_ofx_transactions(f, on_fallback=None):
+    """
+    Lê as transações do primeiro extrato (conta corrente ou cartão) de um OFX.
+
+    `f` deve ser um arquivo aberto em modo binário. As transações são
+    devolvidas uma a uma como OfxTransaction, na ordem do arquivo.
+    `on_fallback(mensagem)` é chamada se o encoding declarado não servir.
+    """
+    prefix = f.read(SNIFF_SIZE)
+    encoding = sniff_encoding(prefix)
+    f.seek(0)
+    if on_fallback is not None and encoding == 'cp1252':
+        declared = declared_encoding(prefix)
+        if declared != 'cp1252':
+            on_fallback(f"o OFX declara {declared or 'nenhum encoding'}, mas não é UTF-8 válido: lido como cp1252")
+
+    in_statement = False
+    found_statement = False
+    fields = None
+    count = 0
+
+    for closing, name, text in _iter_tokens(f, encoding):
+        if name in _STATEMENT_TAGS:
+            if closing and in_statement:
+                break
+            in_statement = not closing
+            found_statement = found_statement or in_statement
+        elif not in_statement:
+            continue
+        elif name == 'STMTTRN' or (name == 'BANKTRANLIST' and closing):
+            # Alguns bancos esquecem o </STMTTRN>; uma nova transação (ou o fim da lista) fecha a anterior.
+            if fields is not None:
+                count += 1
+                yield _build_transaction(fields, count)
+            fields = {} if name == 'STMTTRN' and not closing else None
+        elif fields is not None and not closing:
+            fields[name] = html.unescape(text).strip()
+
+    if fields is not None:
+        count += 1
+        yield _build_transaction(fields, count)
+
+    if not found_statement:
+        raise ValueError("Falha ao processar OFX: nenhum extrato (STMTRS/CCSTMTRS) encontrado no arquivo.")
@@ -0,0 +1,100 @@
+"""
+Geração de OFX (SGML 1.02) a partir de DataFrames, coluna a coluna.
+
+As datas, valores, TRNTYPE e FITID são formatados para o bloco inteiro de uma
+vez e os <STMTTRN> são gravados no destino bloco a bloco, sem montar o arquivo
+completo numa única string. O texto do MEMO é escapado (&, <, >).
+"""
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Linhas formatadas e gravadas de cada vez
+WRITE_CHUNK_ROWS = 10000
+
+OFX_TEMPLATE = "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\nCOMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n<OFX>\n  <SIGNONMSGSRSV1>\n    <SONRS>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <DTSERVER>{date_now}</DTSERVER>\n      <LANGUAGE>POR</LANGUAGE>\n    </SONRS>\n  </SIGNONMSGSRSV1>\n  <BANKMSGSRSV1>\n    <STMTTRNRS>\n      <TRNUID>1</TRNUID>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <STMTRS>\n        <CURDEF>BRL</CURDEF>\n        <BANKACCTFROM>\n          <BANKID>000</BANKID>\n          <ACCTID>00000-0</ACCTID>\n          <ACCTTYPE>CHECKING</ACCTTYPE>\n        </BANKACCTFROM>\n        <BANKTRANLIST>\n          <DTSTART>{start_date}</DTSTART>\n          <DTEND>{end_date}</DTEND>\n          {transactions}\n        </BANKTRANLIST>\n      </STMTRS>\n    </STMTTRNRS>\n  </BANKMSGSRSV1>\n</OFX>"
+OFX_HEAD, OFX_TAIL = OFX_TEMPLATE.split("{transactions}")
+
+DATETIME_FORMAT = '%Y%m%d%H%M%S'
+# Mesmo tamanho de uma data real, para poder ser sobrescrito no fim
+_DATE_PLACEHOLDER = "0" * 14
+
+
+def escape_sgml(series):
+    """Escapa os caracteres especiais de SGML de uma coluna de texto."""
+    return series.str.replace("&", "&amp;", regex=False).str.replace("<", "&lt;", regex=False).str.replace(">", "&gt;", regex=False)
+
+
+class OfxWriter:
+    """
+    Grava um OFX num destino de texto (arquivo ou StringIO), um DataFrame por vez.
+
+    Cada DataFrame precisa das colunas 'data' (datetime), 'descricao' e
+    'valor' (numérico); o índice entra no FITID, como no csv_to_ofx original.
+    DTSTART/DTEND só são conhecidos no fim: em destinos com seek o cabeçalho é
+    reescrito no lugar, nos demais as transações passam por um arquivo temporário.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.start = None
+        self.end = None
+        self.rows = 0
+        self._date_now = datetime.now().strftime(DATETIME_FORMAT)
+        if sink.seekable():
+            self._header_pos = sink.tell()
+            self._body = sink
+            sink.write(self._head(_DATE_PLACEHOLDER, _DATE_PLACEHOLDER))
+        else:
+            self._header_pos = None
+            self._body = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024, mode='w+', encoding='utf-8')
+
+    def _head(self, start_date, end_date):
+        return OFX_HEAD.format(date_now=self._date_now, start_date=start_date, end_date=end_date)
+
+    def write(self, df):
+        for begin in range(0, len(df), WRITE_CHUNK_ROWS):
+            chunk = df.iloc[begin:begin + WRITE_CHUNK_ROWS]
+            self._body.write("".join(self._format_block(chunk).tolist()))
+            self.rows += len(chunk)
+
+        if len(df):
+            start, end = df['data'].min(), df['data'].max()
+            self.start = start if self.start is None else min(self.start, start)
+            self.end = end if self.end is None else max(self.end, end)
+
+    @staticmethod
+    def _format_block(chunk):
+        dates = chunk['data']
+        values = chunk['valor']
+        trntype = pd.Series(np.where(values >= 0, "CREDIT", "DEBIT"), index=chunk.index)
+        fitid = dates.dt.strftime('%Y%m%d') + chunk.index.astype(str)
+        # Descrição vazia (NaN/NA) vira MEMO vazio, como no XML
+        memo = escape_sgml(chunk['descricao'].fillna('').astype(str))
+        return ("\n          <STMTTRN>\n            <TRNTYPE>" + trntype
+                + "</TRNTYPE>\n            <DTPOSTED>" + dates.dt.strftime(DATETIME_FORMAT)
+                + "</DTPOSTED>\n            <TRNAMT>" + values.map("{:.2f}".format)
+                + "</TRNAMT>\n            <FITID>" + fitid
+                + "</FITID>\n            <MEMO>" + memo
+                + "</MEMO>\n          </STMTTRN>")
+
+    def close(self):
+        if self.start is None:
+            raise ValueError("Erro: nenhuma transação para gerar o OFX.")
+        head = self._head(self.start.strftime(DATETIME_FORMAT), self.end.strftime(DATETIME_FORMAT))
+        if self._header_pos is not None:
+            self.sink.seek(self._header_pos)
+            self.sink.write(head)
+            self.sink.seek(0, 2)
+        else:
+            self.sink.write(head)
+            self._body.seek(0)
+            while True:
+                block = self._body.read(1024 * 1024)
+                if not block:
+                    break
+                self.sink.write(block)
+            self._body.close()
+        self.sink.write(OFX_TAIL)
@@ -0,0 +1,155 @@
+"""
+Montagem de PDF a partir de várias imagens, página por página.
+
+O PDF é escrito direto no destino enquanto as imagens são processadas; só os
+números dos objetos ficam em memória até o fim. JPEGs baseline (o caso comum
+de digitalizações) entram no PDF como estão, com o filtro DCTDecode: sem
+decodificar e codificar de novo, sem perda de qualidade. Os demais formatos
+(PNG, JPEG progressivo, CMYK...) são decodificados pelo Pillow num pool de
+processos.
+"""
+import io
+import os
+import struct
+from collections import deque
+
+from pdf_writer import PdfObjectWriter
+
+# Mesma resolução usada antes no Image.save(..., "PDF", resolution=100.0)
+DEFAULT_RESOLUTION = 100.0
+# Qualidade ao recodificar imagens que não podem ser embutidas diretamente
+REENCODE_QUALITY = 90
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+# Marcadores SOF de JPEG baseline/sequencial (SOF0, SOF1), aceitos pelo DCTDecode
+_BASELINE_SOF = (0xC0, 0xC1)
+# Demais SOF: progressivo, sem perdas, aritmético...
+_OTHER_SOF = (0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF)
+_COLORSPACES = {1: '/DeviceGray', 3: '/DeviceRGB'}
+
+
+def list_images(input_path):
+    """Aceita um arquivo, um diretório (imagens em ordem alfabética) ou uma lista de caminhos."""
+    if isinstance(input_path, (list, tuple)):
+        return list(input_path)
+    if os.path.isdir(input_path):
+        names = sorted(name for name in os.listdir(input_path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        return [os.path.join(input_path, name) for name in names]
+    return [input_path]
+
+
+def baseline_jpeg_info(path):
+    """
+    Lê só os cabeçalhos do arquivo e devolve (largura, altura, componentes)
+    se for um JPEG baseline em tons de cinza ou RGB; senão, None.
+    """
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            code = marker[1]
+            if code == 0xFF:
+                # Bytes de preenchimento entre segmentos
+                f.seek(-1, 1)
+                continue
+            if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+                continue
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0]
+            if code in _BASELINE_SOF:
+                try:
+                    precision, height, width, components = struct.unpack('>BHHB', f.read(6))
+                except struct.error:
+                    # SOF truncado: o Pillow decide se a imagem ainda pode ser recodificada
+                    return None
+                if precision != 8 or components not in _COLORSPACES or not width or not height:
+                    return None
+                return width, height, components
+            if code in _OTHER_SOF or code in (0xD9, 0xDA):
+                return None
+            f.seek(length - 2, 1)
+
+
+def _reencode(path):
+    """Executado num processo do pool: decodifica a imagem e devolve um JPEG RGB/cinza."""
+    from PIL import Image
+
+    try:
+        image = Image.open(path)
+        image.load()
+    except Exception:
+        raise ValueError(f"O arquivo '{os.path.basename(path)}' não é um formato de imagem válido (JPG, PNG, etc.).")
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=REENCODE_QUALITY)
+    return buffer.getvalue(), image.width, image.height, 1 if image.mode == 'L' else 3
+
+
+class PdfImageWriter(PdfObjectWriter):
+    """Escreve um PDF com uma imagem por página, sem guardar as páginas em memória."""
+
+    def __init__(self, sink, resolution=DEFAULT_RESOLUTION):
+        super().__init__(sink)
+        self.resolution = resolution
+
+    def add_jpeg(self, width, height, components, data=None, path=None):
+        """Adiciona uma página com um JPEG já codificado (bytes em `data` ou o arquivo em `path`)."""
+        image_id = self.new_id()
+        extra = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                 f"/ColorSpace {_COLORSPACES[components]} /BitsPerComponent 8 /Filter /DCTDecode")
+        if data is not None:
+            self.write_stream(image_id, data, extra)
+        else:
+            self.write_file_stream(image_id, path, os.path.getsize(path), extra)
+
+        page_w = width * 72.0 / self.resolution
+        page_h = height * 72.0 / self.resolution
+        content = f"q {page_w:.4f} 0 0 {page_h:.4f} 0 0 cm /Im0 Do Q".encode('ascii')
+        self.add_page(page_w, page_h, content, f"<< /XObject << /Im0 {image_id} 0 R >> >>")
+
+
+def iter_prepared_images(paths, workers=None):
+    """
+    Gera, na ordem de `paths`, (caminho, info, jpeg_bytes) para cada imagem:
+    JPEGs baseline vêm com info=(largura, altura, componentes) e jpeg_bytes=None
+    (serão copiados do arquivo); as demais são recodificadas no pool de processos.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    infos = [baseline_jpeg_info(path) for path in paths]
+    to_decode = [path for path, info in zip(paths, infos) if info is None]
+    workers = min(workers or os.cpu_count() or 1, max(len(to_decode), 1))
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(to_decode) > 1 else None
+    try:
+        in_flight = deque()
+        decode_iter = iter(to_decode)
+
+        def submit_next():
+            path = next(decode_iter, None)
+            if path is not None:
+                in_flight.append(pool.submit(_reencode, path))
+
+        if pool is not None:
+            for _ in range(2 * workers):
+                submit_next()
+
+        for path, info in zip(paths, infos):
+            if info is not None:
+                yield path, info, None
+                continue
+            if pool is None:
+                data, width, height, components = _reencode(path)
+            else:
+                data, width, height, components = in_flight.popleft().result()
+                submit_next()
+            yield path, (width, height, components), data
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
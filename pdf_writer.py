@@ -0,0 +1,84 @@
+"""
+Escrita incremental de PDF: cada objeto vai para o destino assim que é criado.
+
+Só a posição de cada objeto (para a tabela xref) e a lista de páginas ficam
+em memória, então o tamanho do documento não pesa na memória. Usado pela
+montagem de PDF a partir de imagens e pelos relatórios de transações.
+"""
+import shutil
+import zlib
+
+PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+
+class PdfObjectWriter:
+    """Base para escrever um PDF em streaming; os objetos 1 e 2 são o catálogo e as páginas."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._pos = 0
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 3
+        self._write(PDF_HEADER)
+
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+
+    def _write(self, data):
+        self.sink.write(data)
+        self._pos += len(data)
+
+    def new_id(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _begin_object(self, obj_id):
+        self._offsets[obj_id] = self._pos
+        self._write(f"{obj_id} 0 obj\n".encode('ascii'))
+
+    def write_object(self, obj_id, body):
+        """Escreve um objeto simples (dicionário, array...) dado como texto."""
+        self._begin_object(obj_id)
+        self._write(body.encode('latin-1') + b"\nendobj\n")
+
+    def write_stream(self, obj_id, data, extra="", compress=False):
+        """Escreve um objeto stream com os bytes de `data` (comprimidos com Flate se pedido)."""
+        if compress:
+            data = zlib.compress(data)
+            extra = f"{extra} /Filter /FlateDecode".strip()
+        self._begin_object(obj_id)
+        self._write(f"<< {extra} /Length {len(data)} >>\nstream\n".encode('latin-1'))
+        self._write(data)
+        self._write(b"\nendstream\nendobj\n")
+
+    def write_file_stream(self, obj_id, path, length, extra=""):
+        """Como write_stream, mas copia o conteúdo de um arquivo sem carregá-lo inteiro."""
+        self._begin_object(obj_id)
+        self._write(f"<< {extra} /Length {length} >>\nstream\n".encode('latin-1'))
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.sink)
+        self._pos += length
+        self._write(b"\nendstream\nendobj\n")
+
+    def add_page(self, width, height, content, resources, compress=False):
+        """Adiciona uma página com o fluxo de conteúdo `content` (bytes) e o dicionário `resources`."""
+        content_id, page_id = self.new_id(), self.new_id()
+        self.write_stream(content_id, content, compress=compress)
+        self.write_object(page_id, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.4f} {height:.4f}] "
+                                    f"/Resources {resources} /Contents {content_id} 0 R >>"))
+        self._page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self.write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>")
+        self.write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_pos = self._pos
+        size = self._next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        lines += [f"{self._offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, size)]
+        lines.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_pos}\n%%EOF\n")
+        self._write("".join(lines).encode('ascii'))
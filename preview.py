@@ -0,0 +1,628 @@
+"""
+Visualização virtualizada de documentos com muitas páginas (PDF e listas de JPG)
+e de textos grandes (CSV, XML, OFX).
+
+Em vez de criar um widget com a imagem em tamanho cheio para cada página, a
+janela só renderiza as páginas visíveis (e algumas vizinhas), já na largura em
+que serão exibidas. As imagens prontas ficam num cache LRU limitado em bytes,
+então a memória não cresce com o número de páginas do documento.
+
+Textos são abertos com mmap: um índice de onde começam as linhas é montado
+em segundo plano e só as linhas visíveis são lidas e decodificadas, então
+um CSV de 1 GB abre na hora e pode ser percorrido, pesquisado e aberto numa
+linha qualquer.
+"""
+import io
+import mmap
+import os
+import re
+import threading
+import tkinter
+import tkinter.font
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import customtkinter
+import fitz  # PyMuPDF
+from PIL import Image, ImageTk
+
+from jobs import FAILED, cancel_and_wait
+
+PAGE_GAP = 10
+# Páginas renderizadas antes e depois da área visível
+PREFETCH_PAGES = 2
+# Orçamento de memória das páginas já renderizadas (RGB, 3 bytes por pixel)
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+SCROLL_STEP = 40
+# O índice de texto guarda quantas linhas começam antes de cada bloco deste tamanho
+INDEX_BLOCK_BYTES = 256 * 1024
+# Trecho do arquivo examinado por vez na busca (entre dois pontos de cancelamento)
+SEARCH_WINDOW_BYTES = 8 * 1024 * 1024
+# Linhas muito longas são cortadas na exibição
+MAX_LINE_BYTES = 4096
+TEXT_SCROLL_LINES = 3
+INDEX_POLL_MS = 200
+
+
+class PdfPageSource:
+    """Páginas de um PDF (caminho do arquivo ou bytes), rasterizadas sob demanda."""
+
+    def __init__(self, pdf):
+        self.doc = fitz.open(stream=pdf, filetype="pdf") if isinstance(pdf, bytes) else fitz.open(pdf)
+        # Tamanho em pontos (1/72 pol.); não rasteriza nada
+        self._sizes = [(page.rect.width, page.rect.height) for page in self.doc]
+
+    @property
+    def page_count(self):
+        return len(self._sizes)
+
+    def natural_size(self, index, screen_dpi):
+        width, height = self._sizes[index]
+        return width * screen_dpi / 72, height * screen_dpi / 72
+
+    def render(self, index, size):
+        page = self.doc.load_page(index)
+        matrix = fitz.Matrix(size[0] / page.rect.width, size[1] / page.rect.height)
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    def close(self):
+        self.doc.close()
+
+
+def _open_image(image):
+    return Image.open(io.BytesIO(image) if isinstance(image, bytes) else image)
+
+
+class JpegPageSource:
+    """Lista de imagens (caminhos ou bytes codificados, ex.: resultado de pdf_to_jpg)."""
+
+    def __init__(self, images):
+        self.images = images
+        self._sizes = []
+        for image in images:
+            # Image.open só lê o cabeçalho: o tamanho sai sem decodificar a imagem
+            with _open_image(image) as header:
+                self._sizes.append(header.size)
+
+    @property
+    def page_count(self):
+        return len(self._sizes)
+
+    def natural_size(self, index, screen_dpi):
+        return self._sizes[index]
+
+    def render(self, index, size):
+        with _open_image(self.images[index]) as image:
+            # Para JPEG, draft() decodifica direto numa escala reduzida (1/2, 1/4, 1/8)
+            image.draft("RGB", size)
+            return image.convert("RGB").resize(size, Image.Resampling.BILINEAR)
+
+    def close(self):
+        pass
+
+
+class TextLineIndex:
+    """
+    Linhas de um arquivo de texto UTF-8, lidas por mmap sob demanda.
+
+    Uma thread conta as quebras de linha bloco a bloco; para cada bloco de
+    INDEX_BLOCK_BYTES fica só o número de linhas antes dele, então o índice
+    de um arquivo de 1 GB tem poucos milhares de inteiros. Enquanto o índice
+    não termina, as linhas já contadas podem ser exibidas normalmente.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap não aceita arquivos vazios
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._ends_with_newline = not self.size or self._map[-1:] == b'\n'
+        # _block_lines[k] = quebras de linha antes do início do bloco k
+        self._block_lines = [0]
+        self._indexed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._build, name="indice-texto", daemon=True)
+        self._thread.start()
+
+    def _build(self):
+        for start in range(0, self.size, INDEX_BLOCK_BYTES):
+            if self._stop.is_set():
+                return
+            end = min(start + INDEX_BLOCK_BYTES, self.size)
+            self._block_lines.append(self._block_lines[-1] + self._map[start:end].count(b'\n'))
+            self._indexed = end
+
+    @property
+    def complete(self):
+        return self._indexed >= self.size
+
+    @property
+    def progress(self):
+        return self._indexed / self.size if self.size else 1.0
+
+    @property
+    def line_count(self):
+        """Linhas conhecidas até agora (o total, quando `complete`)."""
+        lines = self._block_lines[-1]
+        if self.complete and not self._ends_with_newline:
+            lines += 1
+        return lines
+
+    def line_offset(self, line):
+        """Posição (em bytes) do começo da linha `line` (a partir de 0)."""
+        if line <= 0 or self._map is None:
+            return 0
+        block_lines = self._block_lines
+        # Último bloco que começa antes da quebra que abre a linha
+        block = bisect_left(block_lines, line) - 1
+        position = block * INDEX_BLOCK_BYTES
+        for _ in range(line - block_lines[block]):
+            found = self._map.find(b'\n', position)
+            if found < 0:
+                return self.size
+            position = found + 1
+        return position
+
+    def lines(self, first, count):
+        """Até `count` linhas a partir de `first`, já decodificadas."""
+        result = []
+        position = self.line_offset(first)
+        while len(result) < count and position < self.size:
+            end = self._map.find(b'\n', position)
+            if end < 0:
+                end = self.size
+            text = self._map[position:min(end, position + MAX_LINE_BYTES)].decode('utf-8', errors='replace').rstrip('\r')
+            if end - position > MAX_LINE_BYTES:
+                text += " …"
+            result.append(text)
+            position = end + 1
+        return result
+
+    def line_at(self, offset):
+        """Número da linha que contém a posição `offset`."""
+        block = min(offset // INDEX_BLOCK_BYTES, len(self._block_lines) - 1)
+        lines = self._block_lines[block]
+        position = block * INDEX_BLOCK_BYTES
+        # Fora da parte já indexada, conta aos poucos para não copiar trechos grandes
+        while position < offset:
+            end = min(position + INDEX_BLOCK_BYTES, offset)
+            lines += self._map[position:end].count(b'\n')
+            position = end
+        return lines
+
+    def column(self, line_start, offset):
+        """Coluna (em caracteres) de `offset` dentro da linha que começa em `line_start`."""
+        return len(self._map[line_start:offset].decode('utf-8', errors='replace'))
+
+    def search(self, text, start=0, report=None, end=None):
+        """
+        Procura `text` (sem diferenciar maiúsculas de minúsculas ASCII) de
+        `start` até `end`; devolve (início, fim) em bytes ou None.
+        `report(feito, total)` é chamada entre os trechos (permite cancelar).
+        """
+        needle = text.encode('utf-8')
+        if not needle or self._map is None:
+            return None
+        pattern = re.compile(re.escape(needle), re.IGNORECASE)
+        end = self.size if end is None else min(end, self.size)
+        position = start
+        while position < end:
+            # Os trechos se sobrepõem para achar ocorrências que cruzam a divisa
+            window_end = min(position + SEARCH_WINDOW_BYTES + len(needle) - 1, end)
+            match = pattern.search(self._map, position, window_end)
+            if match:
+                return match.start(), match.end()
+            position += SEARCH_WINDOW_BYTES
+            if report is not None:
+                report(min(position, end) - start, end - start)
+        return None
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class PageCache:
+    """Cache LRU de páginas renderizadas, limitado pelo total de bytes."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        if key in self._items:
+            self.size -= self._cost(self._items.pop(key))
+        self._items[key] = image
+        self.size += self._cost(image)
+        while self.size > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= self._cost(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+
+    @staticmethod
+    def _cost(image):
+        return image.width * image.height * 3
+
+
+class PagedImageView(customtkinter.CTkFrame):
+    def __init__(self, master, source, jobs, on_status=None, on_error=None):
+        super().__init__(master)
+        self.source = source
+        self.jobs = jobs
+        self.on_status = on_status
+        self.on_error = on_error
+        self.cache = PageCache()
+        self.screen_dpi = self.winfo_fpixels('1i')
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        background = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkFrame"]["fg_color"])
+        self.canvas = tkinter.Canvas(self, highlightthickness=0, bg=background, yscrollincrement=SCROLL_STEP)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+
+        self._layout_width = 0
+        self._sizes = []     # tamanho de exibição de cada página, em pixels
+        self._offsets = []   # posição vertical do topo de cada página
+        self._shown = {}     # página -> (PhotoImage ou None, ids no canvas)
+        self._pending = {}   # página -> Job de renderização
+        self._started = []   # renderizações enviadas ao pool, inclusive as já canceladas
+        self._update_scheduled = False
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self._scroll(-1))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll(1))
+
+    # --- Layout ---
+    def _relayout(self, width):
+        self._layout_width = width
+        available = max(width - 2 * PAGE_GAP, 50)
+        self._sizes, self._offsets = [], []
+        y = PAGE_GAP
+        for index in range(self.source.page_count):
+            natural_w, natural_h = self.source.natural_size(index, self.screen_dpi)
+            # Ajusta à largura da janela, sem ampliar além da resolução da tela
+            scale = min(available / natural_w, 1.0)
+            size = (max(int(natural_w * scale), 1), max(int(natural_h * scale), 1))
+            self._sizes.append(size)
+            self._offsets.append(y)
+            y += size[1] + PAGE_GAP
+        self.canvas.configure(scrollregion=(0, 0, width, y))
+        for page in list(self._shown):
+            self._hide(page)
+
+    def _on_resize(self, event):
+        if event.width != self._layout_width:
+            self._relayout(event.width)
+        self._schedule_update()
+
+    # --- Rolagem ---
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_update()
+
+    def _on_mousewheel(self, event):
+        self._scroll(-1 if event.delta > 0 else 1)
+
+    def _scroll(self, units):
+        self.canvas.yview_scroll(units, "units")
+        self._schedule_update()
+
+    def _schedule_update(self):
+        if not self._update_scheduled:
+            self._update_scheduled = True
+            self.after_idle(self._update_viewport)
+
+    # --- Renderização ---
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(bisect_right(self._offsets, top) - 1, 0)
+        last = max(bisect_right(self._offsets, bottom) - 1, first)
+        return first, min(last, self.source.page_count - 1)
+
+    def _update_viewport(self):
+        self._update_scheduled = False
+        if not self._offsets or not self.winfo_exists():
+            return
+        first, last = self._visible_range()
+        wanted = range(max(first - PREFETCH_PAGES, 0), min(last + PREFETCH_PAGES, self.source.page_count - 1) + 1)
+
+        for page in list(self._shown):
+            if page not in wanted:
+                self._hide(page)
+        for page in list(self._pending):
+            if page not in wanted:
+                self._pending.pop(page).cancel()
+        # Visíveis primeiro, depois as vizinhas
+        for page in sorted(wanted, key=lambda p: not first <= p <= last):
+            if page not in self._shown or self._shown[page][0] is None:
+                self._show(page)
+
+        if self.on_status:
+            self.on_status(f"Páginas {first + 1}–{last + 1} de {self.source.page_count}")
+
+    def _show(self, page):
+        size = self._sizes[page]
+        image = self.cache.get((page, size))
+        if page in self._shown:
+            if image is None:
+                return
+            self._hide(page)
+
+        x = self._layout_width // 2
+        y = self._offsets[page]
+        if image is None:
+            items = (
+                self.canvas.create_rectangle(x - size[0] // 2, y, x + size[0] // 2, y + size[1], outline="gray50"),
+                self.canvas.create_text(x, y + size[1] // 2, text=f"Página {page + 1}", fill="gray50"),
+            )
+            self._shown[page] = (None, items)
+            self._request_render(page, size)
+        else:
+            photo = ImageTk.PhotoImage(image)
+            items = (self.canvas.create_image(x, y, image=photo, anchor="n"),)
+            self._shown[page] = (photo, items)
+
+    def _hide(self, page):
+        _, items = self._shown.pop(page)
+        for item in items:
+            self.canvas.delete(item)
+
+    def _request_render(self, page, size):
+        if page in self._pending:
+            return
+
+        def work(report):
+            report(0, 1)  # desiste se a página já saiu da tela
+            image = self.source.render(page, size)
+            self.jobs.post(self._on_rendered, page, size, image)
+
+        self._pending[page] = self.jobs.submit(f"Página {page + 1}", work, self._on_render_update)
+        self._started = [job for job in self._started if not job.finished] + [self._pending[page]]
+
+    def _on_rendered(self, page, size, image):
+        if not self.winfo_exists():
+            return
+        self._pending.pop(page, None)
+        self.cache.put((page, size), image)
+        # Só desenha se a página ainda está na tela e a largura não mudou
+        if page in self._shown and self._shown[page][0] is None and self._sizes[page] == size:
+            self._show(page)
+
+    def _on_render_update(self, job):
+        if job.status == FAILED and self.on_error:
+            self.on_error(job.error)
+
+    def destroy(self):
+        # Fecha o documento já aqui, depois que a página em renderização termina,
+        # para que o arquivo possa ser apagado logo em seguida
+        cancel_and_wait(self._started)
+        self._pending.clear()
+        self._started = []
+        self.cache.clear()
+        self.source.close()
+        super().destroy()
+
+
+class PagedTextView(customtkinter.CTkFrame):
+    """Mostra só as linhas visíveis de um TextLineIndex, com ir para a linha e busca."""
+
+    def __init__(self, master, index, jobs, on_status=None, on_error=None):
+        super().__init__(master)
+        self.index = index
+        self.jobs = jobs
+        self.on_status = on_status
+        self.on_error = on_error
+        self.first_line = 0
+        self._shown_lines = 0
+        # (linha, coluna inicial, coluna final, posição do fim em bytes) da última ocorrência
+        self._match = None
+        self._search_job = None
+        self._searches = []  # buscas enviadas ao pool, inclusive as já canceladas
+        self._update_scheduled = False
+
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        toolbar = customtkinter.CTkFrame(self, fg_color="transparent")
+        toolbar.grid(row=0, column=0, columnspan=3, pady=(0, 5), sticky="ew")
+        self.line_entry = customtkinter.CTkEntry(toolbar, width=110, placeholder_text="Linha")
+        self.line_entry.pack(side="left", padx=(0, 5))
+        self.line_entry.bind("<Return>", lambda event: self.go_to_line())
+        customtkinter.CTkButton(toolbar, text="Ir", width=40, command=self.go_to_line).pack(side="left", padx=(0, 15))
+        self.search_entry = customtkinter.CTkEntry(toolbar, width=220, placeholder_text="Buscar")
+        self.search_entry.pack(side="left", padx=(0, 5))
+        self.search_entry.bind("<Return>", lambda event: self.search_next())
+        customtkinter.CTkButton(toolbar, text="Próximo", width=80, command=self.search_next).pack(side="left")
+
+        background = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkTextbox"]["fg_color"])
+        foreground = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkTextbox"]["text_color"])
+        self.font = tkinter.font.nametofont("TkFixedFont")
+        options = dict(font=self.font, bg=background, fg=foreground, wrap="none", borderwidth=0,
+                       highlightthickness=0, state="disabled", cursor="arrow")
+        self.gutter = tkinter.Text(self, width=8, fg="gray50", **{k: v for k, v in options.items() if k != 'fg'})
+        self.gutter.grid(row=1, column=0, sticky="ns")
+        self.text = tkinter.Text(self, **options)
+        self.text.grid(row=1, column=1, sticky="nsew")
+        self.text.tag_configure("busca", background="#f0c040", foreground="black")
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=2, sticky="ns")
+        self.hscrollbar = customtkinter.CTkScrollbar(self, orientation="horizontal", command=self.text.xview)
+        self.hscrollbar.grid(row=2, column=1, sticky="ew")
+        self.text.configure(xscrollcommand=self.hscrollbar.set)
+
+        self.text.bind("<Configure>", lambda event: self._schedule_update())
+        for widget in (self.text, self.gutter):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda event: self._scroll(-TEXT_SCROLL_LINES))
+            widget.bind("<Button-5>", lambda event: self._scroll(TEXT_SCROLL_LINES))
+        self.after(INDEX_POLL_MS, self._poll_index)
+
+    # --- Rolagem ---
+    def _visible_count(self):
+        return max(self.text.winfo_height() // max(self.font.metrics("linespace"), 1), 1)
+
+    def _on_scrollbar(self, *args):
+        total = self.index.line_count
+        if args[0] == "moveto":
+            self.first_line = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = self._visible_count() if args[2] == "pages" else 1
+            self.first_line += int(args[1]) * step
+        self._schedule_update()
+
+    def _on_mousewheel(self, event):
+        self._scroll(-TEXT_SCROLL_LINES if event.delta > 0 else TEXT_SCROLL_LINES)
+        return "break"
+
+    def _scroll(self, lines):
+        self.first_line += lines
+        self._schedule_update()
+        return "break"
+
+    def _schedule_update(self):
+        if not self._update_scheduled:
+            self._update_scheduled = True
+            self.after_idle(self._update_view)
+
+    def _poll_index(self):
+        if not self.winfo_exists():
+            return
+        # Redesenha o texto só se ainda faltavam linhas para encher a janela
+        self._update_view(redraw=self._shown_lines < self._visible_count())
+        if not self.index.complete:
+            self.after(INDEX_POLL_MS, self._poll_index)
+
+    # --- Exibição ---
+    def _update_view(self, redraw=True):
+        self._update_scheduled = False
+        if not self.winfo_exists():
+            return
+        count = self._visible_count()
+        total = self.index.line_count
+        if self.index.complete:
+            self.first_line = min(self.first_line, max(total - count, 0))
+        self.first_line = max(self.first_line, 0)
+
+        if redraw:
+            lines = self.index.lines(self.first_line, count)
+            self._shown_lines = len(lines)
+            width = len(str(self.first_line + len(lines)))
+            numbers = "\n".join(str(self.first_line + i + 1).rjust(width) for i in range(len(lines)))
+            self._replace(self.gutter, numbers)
+            self.gutter.configure(width=max(width, 4) + 1)
+            self._replace(self.text, "\n".join(lines))
+            if self._match is not None and self.first_line <= self._match[0] < self.first_line + len(lines):
+                row = self._match[0] - self.first_line + 1
+                self.text.tag_add("busca", f"{row}.{self._match[1]}", f"{row}.{self._match[2]}")
+                self.text.see(f"{row}.{self._match[1]}")
+
+        if total:
+            self.scrollbar.set(min(self.first_line / total, 1.0), min((self.first_line + self._shown_lines) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if self.on_status:
+            last = self.first_line + self._shown_lines
+            status = f"Linhas {min(self.first_line + 1, last)}–{last} de {total}"
+            if not self.index.complete:
+                status += f"+ (indexando {self.index.progress:.0%})"
+            self.on_status(status)
+
+    @staticmethod
+    def _replace(widget, text):
+        widget.configure(state="normal")
+        widget.delete("1.0", "end")
+        widget.insert("1.0", text)
+        widget.configure(state="disabled")
+
+    # --- Ir para linha e busca ---
+    def go_to_line(self):
+        try:
+            line = int(self.line_entry.get().strip())
+        except ValueError:
+            self._report("Digite o número da linha.")
+            return
+        if line < 1 or (self.index.complete and line > self.index.line_count):
+            self._report(f"Linha fora do arquivo (1 a {self.index.line_count}).")
+            return
+        # Deixa a linha pedida perto do topo
+        self.first_line = line - 1 - min(self._visible_count() // 4, line - 1)
+        self._match = (line - 1, 0, "end", None)
+        self._schedule_update()
+
+    def search_next(self):
+        text = self.search_entry.get()
+        if not text:
+            return
+        if self._search_job is not None:
+            self._search_job.cancel()
+        # Continua depois da última ocorrência ou, sem ela, do topo da tela
+        if self._match is not None and self._match[3] is not None:
+            start = self._match[3]
+        else:
+            start = self.index.line_offset(self.first_line)
+        index = self.index
+
+        def work(report):
+            found = index.search(text, start, report)
+            if found is None and start:
+                # Recomeça do início do arquivo
+                found = index.search(text, 0, report, start + len(text.encode('utf-8')))
+            if found is not None:
+                line = index.line_at(found[0])
+                line_start = index.line_offset(line)
+                found = (line, index.column(line_start, found[0]), index.column(line_start, found[1]), found[1])
+            self.jobs.post(self._on_found, text, found)
+
+        self._report(f"Buscando '{text}'...")
+        self._search_job = self.jobs.submit(f"Buscar '{text}'", work, self._on_search_update)
+        self._searches = [job for job in self._searches if not job.finished] + [self._search_job]
+
+    def _on_found(self, text, found):
+        if not self.winfo_exists():
+            return
+        self._search_job = None
+        if found is None:
+            self._match = None
+            self._report(f"'{text}' não encontrado.")
+            self._schedule_update()
+            return
+        self._match = found
+        line = found[0]
+        if not self.first_line <= line < self.first_line + self._visible_count():
+            self.first_line = line - self._visible_count() // 3
+        self._update_view()
+
+    def _on_search_update(self, job):
+        if job.status == FAILED and self.on_error:
+            self.on_error(job.error)
+
+    def _report(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def destroy(self):
+        # Espera a busca em andamento desistir e fecha o mmap já aqui, para que
+        # o arquivo possa ser apagado logo em seguida
+        cancel_and_wait(self._searches)
+        self._searches = []
+        self.index.close()
+        super().destroy()
@@ -0,0 +1,111 @@
+"""
+Rasterização de PDF em JPEG, em paralelo.
+
+As páginas são divididas em lotes pequenos e distribuídas num pool de
+processos; cada processo abre o seu próprio documento (objetos do PyMuPDF não
+podem ser compartilhados entre processos). As páginas são devolvidas em ordem
+assim que ficam prontas e só alguns lotes ficam em andamento ao mesmo tempo,
+então a memória não cresce com o tamanho do documento.
+"""
+import os
+from collections import deque
+
+# Mesmos padrões do get_pixmap()/tobytes("jpeg") usados antes
+DEFAULT_DPI = 72
+DEFAULT_QUALITY = 95
+# Nomes dos espaços de cor no PyMuPDF (importado só quando uma página é renderizada)
+COLORSPACES = {'rgb': 'csRGB', 'gray': 'csGRAY', 'cmyk': 'csCMYK'}
+# Páginas por tarefa enviada a um processo
+BATCH_PAGES = 4
+# Abaixo disso o custo de iniciar processos não compensa
+MIN_PARALLEL_PAGES = 8
+
+
+def parse_page_range(spec, page_count):
+    """Converte '1-3,7,10-' (páginas começando em 1) em índices começando em 0."""
+    if not spec:
+        return list(range(page_count))
+    pages = []
+    for part in str(spec).replace(' ', '').split(','):
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                first, last = part.split('-', 1)
+                first = int(first) if first else 1
+                last = int(last) if last else page_count
+            else:
+                first = last = int(part)
+        except ValueError:
+            raise ValueError(f"Intervalo de páginas inválido: '{part}'.")
+        if first < 1 or last > page_count or first > last:
+            raise ValueError(f"Intervalo de páginas fora do documento: '{part}' (o PDF tem {page_count} páginas).")
+        pages.extend(range(first - 1, last))
+    return pages
+
+
+def render_page(page, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY, colorspace='rgb'):
+    import fitz  # PyMuPDF
+
+    zoom = dpi / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=getattr(fitz, COLORSPACES[colorspace]), alpha=False)
+    if dpi != DEFAULT_DPI:
+        # Grava a resolução no JPEG; no padrão mantém os bytes idênticos aos de antes
+        pix.set_dpi(dpi, dpi)
+    return pix.tobytes("jpeg", jpg_quality=quality)
+
+
+def _render_batch(input_path, page_numbers, dpi, quality, colorspace):
+    """Executado dentro de um processo do pool."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(input_path) as doc:
+        return [(number, render_page(doc.load_page(number), dpi, quality, colorspace)) for number in page_numbers]
+
+
+def iter_pdf_pages(input_path, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY, pages=None, colorspace='rgb', workers=None):
+    """
+    Gera (índice_da_página, bytes_jpeg) na ordem das páginas.
+
+    `pages` aceita um intervalo como '1-3,7'; `workers` é o número de
+    processos (padrão: núcleos da máquina; 1 renderiza no próprio processo).
+    """
+    if colorspace not in COLORSPACES:
+        raise ValueError(f"Espaço de cor inválido: '{colorspace}' (use {', '.join(COLORSPACES)}).")
+    import fitz  # PyMuPDF
+
+    with fitz.open(input_path) as doc:
+        page_numbers = parse_page_range(pages, len(doc))
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(page_numbers) < MIN_PARALLEL_PAGES:
+            for number in page_numbers:
+                yield number, render_page(doc.load_page(number), dpi, quality, colorspace)
+            return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    batches = [page_numbers[i:i + BATCH_PAGES] for i in range(0, len(page_numbers), BATCH_PAGES)]
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(batches)))
+    try:
+        in_flight = deque()
+        pending = iter(batches)
+        # Mantém no máximo dois lotes por processo em andamento
+        for batch in pending:
+            in_flight.append(pool.submit(_render_batch, input_path, batch, dpi, quality, colorspace))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            for item in in_flight.popleft().result():
+                yield item
+            batch = next(pending, None)
+            if batch is not None:
+                in_flight.append(pool.submit(_render_batch, input_path, batch, dpi, quality, colorspace))
+    finally:
+        # Se quem consome parar no meio (cancelamento, erro), descarta o resto
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def page_output_path(output_path, page_number):
+    """'saida/extrato.jpg' + página 3 -> 'saida/extrato_pagina_3.jpg'."""
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_pagina_{page_number}{ext or '.jpg'}"
@@ -0,0 +1,207 @@
+"""
+Relatórios tabulares em PDF (extratos OFX e CSV), gerados página por página.
+
+As linhas são desenhadas direto no fluxo de conteúdo de cada página, com o
+cabeçalho da tabela repetido no topo e o total acumulado no rodapé. Cada
+página é gravada no destino assim que fica cheia, então um extrato com
+centenas de milhares de transações é gerado em segundos e sem acumular o
+documento em memória (o reportlab monta a tabela inteira antes de paginar).
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from pdf_writer import PdfObjectWriter
+
+MARGIN = 36
+TITLE_SIZE = 18
+FONT_SIZE = 9
+ROW_HEIGHT = 14
+HEADER_HEIGHT = 20
+FOOTER_HEIGHT = 20
+CELL_PADDING = 4
+MIN_COLUMN_WIDTH = 30
+# Linhas usadas para estimar a largura de cada coluna
+WIDTH_SAMPLE_ROWS = 500
+# Acima disso a página fica em paisagem
+LANDSCAPE_COLUMNS = 6
+# Mesmas cores da tabela do reportlab usada antes (grey, whitesmoke, beige)
+HEADER_BACKGROUND = "0.502 0.502 0.502"
+HEADER_TEXT = "0.961 0.961 0.961"
+ROW_BACKGROUND = "0.961 0.961 0.863"
+
+_FONT = 'Helvetica'
+_BOLD_FONT = 'Helvetica-Bold'
+# Largura máxima de um caractere da Helvetica, em fração do tamanho da fonte
+_MAX_CHAR_WIDTH = 1.0
+
+
+def parse_amount(text, decimal=None):
+    """
+    Lê valores como '-10.50', '1.234,56' ou 'R$ 5,00'; devolve None se não for número.
+    Com `decimal` ('.' ou ','), o outro separador é o de milhar, como na
+    validação do Converter; sem ele, a vírgula é o decimal quando aparece.
+    """
+    cleaned = re.sub(r'[R$\s]', '', str(text))
+    if decimal is None:
+        decimal = ',' if ',' in cleaned else '.'
+    thousands = '.' if decimal == ',' else ','
+    cleaned = cleaned.replace(thousands, '').replace(decimal, '.')
+    try:
+        value = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    return value if value.is_finite() else None
+
+
+def _pdf_text(text):
+    """Codifica para WinAnsi e escapa para uma string literal de PDF."""
+    data = str(text).encode('cp1252', errors='replace').decode('latin-1')
+    return data.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').replace('\r', ' ').replace('\n', ' ')
+
+
+class PdfReport:
+    def __init__(self, sink, title, columns, total_column=None, decimal=None):
+        self.pagesize = landscape(letter) if len(columns) > LANDSCAPE_COLUMNS else letter
+        self.title = title
+        self.columns = [str(column) for column in columns]
+        self.total_index = self.columns.index(total_column) if total_column in self.columns else None
+        self.total = Decimal(0)
+        # Separador decimal da coluna do total (None: deduzido de cada valor)
+        self.decimal = decimal
+        self.row_count = 0
+
+        self.writer = PdfObjectWriter(sink)
+        font_id, bold_id = self.writer.new_id(), self.writer.new_id()
+        self.writer.write_object(font_id, f"<< /Type /Font /Subtype /Type1 /BaseFont /{_FONT} /Encoding /WinAnsiEncoding >>")
+        self.writer.write_object(bold_id, f"<< /Type /Font /Subtype /Type1 /BaseFont /{_BOLD_FONT} /Encoding /WinAnsiEncoding >>")
+        self.resources = f"<< /Font << /F1 {font_id} 0 R /F2 {bold_id} 0 R >> >>"
+
+        self._widths = None
+        self._text_ops = None
+        self._row_lines = []
+        self._table_top = 0
+        self._y = 0
+
+    # --- Layout ---
+    def _column_widths(self, sample):
+        available = self.pagesize[0] - 2 * MARGIN
+        widths = []
+        for index, column in enumerate(self.columns):
+            values = sorted(stringWidth(str(row[index]), _FONT, FONT_SIZE) for row in sample)
+            typical = values[int(len(values) * 0.9)] if values else 0
+            header = stringWidth(column, _BOLD_FONT, FONT_SIZE)
+            widths.append(max(header, typical, MIN_COLUMN_WIDTH) + 2 * CELL_PADDING)
+        scale = available / sum(widths) if widths else 1
+        return [width * scale for width in widths]
+
+    def _fit(self, text, width, font=_FONT):
+        """Corta o texto com reticências se ele não couber na coluna."""
+        text = str(text)
+        room = width - 2 * CELL_PADDING
+        if len(text) * FONT_SIZE * _MAX_CHAR_WIDTH <= room or stringWidth(text, font, FONT_SIZE) <= room:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if stringWidth(text[:middle] + "…", font, FONT_SIZE) <= room:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + "…"
+
+    def _text(self, x, y, text, font="F1", size=FONT_SIZE):
+        self._text_ops.append(f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_pdf_text(text)}) Tj ET")
+
+    def _draw_cells(self, row, y, font_name, font_key):
+        x = MARGIN
+        for index, (value, width) in enumerate(zip(row, self._widths)):
+            text = self._fit(value, width, font_name)
+            if index == self.total_index and font_key == "F1":
+                # Valores alinhados à direita
+                text_x = x + width - CELL_PADDING - stringWidth(text, font_name, FONT_SIZE)
+            else:
+                text_x = x + CELL_PADDING
+            self._text(text_x, y, text, font_key)
+            x += width
+
+    # --- Páginas ---
+    def _new_page(self):
+        if self._text_ops is not None:
+            self._finish_page()
+        self._text_ops = []
+        self._row_lines = []
+        self._y = self.pagesize[1] - MARGIN
+        if self.writer.page_count == 0:
+            self._y -= TITLE_SIZE
+            self._text(MARGIN, self._y, self.title, "F2", TITLE_SIZE)
+            self._y -= TITLE_SIZE
+        self._table_top = self._y
+        if self.columns:
+            self._text_ops.append(f"{HEADER_TEXT} rg")
+            self._draw_cells(self.columns, self._y - HEADER_HEIGHT + 7, _BOLD_FONT, "F2")
+            self._text_ops.append("0 g")
+            self._y -= HEADER_HEIGHT
+
+    def _finish_page(self, final=False):
+        width = sum(self._widths or [])
+        height = self.pagesize[1]
+        ops = []
+        if self.columns and self._widths:
+            body = self._table_top - HEADER_HEIGHT - self._y
+            ops.append(f"{HEADER_BACKGROUND} rg {MARGIN} {self._table_top - HEADER_HEIGHT:.2f} {width:.2f} {HEADER_HEIGHT} re f")
+            if body > 0:
+                ops.append(f"{ROW_BACKGROUND} rg {MARGIN} {self._y:.2f} {width:.2f} {body:.2f} re f")
+            ops.append("0 g")
+        ops.extend(self._text_ops)
+
+        if self.columns and self._widths:
+            # Grade: linhas horizontais de cada linha da tabela e divisórias das colunas
+            grid = ["0 G 0.5 w"]
+            for y in [self._table_top, self._table_top - HEADER_HEIGHT] + self._row_lines:
+                grid.append(f"{MARGIN} {y:.2f} m {MARGIN + width:.2f} {y:.2f} l")
+            x = MARGIN
+            for column_width in [0] + self._widths:
+                x += column_width
+                grid.append(f"{x:.2f} {self._table_top:.2f} m {x:.2f} {self._y:.2f} l")
+            grid.append("S")
+            ops.extend(grid)
+
+        footer_y = MARGIN - 4
+        if self.total_index is not None:
+            label = "Total" if final else "Total acumulado"
+            ops.append(f"BT /F2 {FONT_SIZE} Tf {MARGIN} {footer_y} Td ({_pdf_text(f'{label}: {self.total:.2f}')}) Tj ET")
+        page_label = f"Página {self.writer.page_count + 1}"
+        page_x = self.pagesize[0] - MARGIN - stringWidth(page_label, _FONT, FONT_SIZE)
+        ops.append(f"BT /F1 {FONT_SIZE} Tf {page_x:.2f} {footer_y} Td ({_pdf_text(page_label)}) Tj ET")
+
+        self.writer.add_page(self.pagesize[0], height, "\n".join(ops).encode('latin-1'), self.resources, compress=True)
+        self._text_ops = None
+
+    def add_rows(self, rows):
+        """Acrescenta linhas (listas de valores, na ordem de `columns`) ao relatório."""
+        if self._widths is None:
+            self._widths = self._column_widths(rows[:WIDTH_SAMPLE_ROWS])
+        for row in rows:
+            if self._text_ops is None or self._y - ROW_HEIGHT < MARGIN + FOOTER_HEIGHT:
+                self._new_page()
+            self._draw_cells(row, self._y - ROW_HEIGHT + 4, _FONT, "F1")
+            self._y -= ROW_HEIGHT
+            self._row_lines.append(self._y)
+            if self.total_index is not None:
+                amount = parse_amount(row[self.total_index], self.decimal)
+                if amount is not None:
+                    self.total += amount
+            self.row_count += 1
+
+    def close(self):
+        if self._widths is None:
+            self._widths = self._column_widths([])
+        if self._text_ops is None:
+            self._new_page()
+        if self.row_count == 0:
+            self._text(MARGIN, self._y - ROW_HEIGHT, "Nenhum registro encontrado.")
+        self._finish_page(final=True)
+        self.writer.close()
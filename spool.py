@@ -0,0 +1,69 @@
+"""
+Resultados das conversões da janela, gravados em arquivos temporários.
+
+Cada conversão grava direto num arquivo de uma pasta temporária da sessão,
+em vez de devolver o documento inteiro em memória. A visualização abre o
+próprio arquivo (ver preview.py), e o download move o arquivo para o destino
+escolhido: um rename atômico quando é o mesmo disco, ou uma cópia para um
+nome temporário seguida de rename nos demais casos. Nada é regravado a
+partir da memória.
+"""
+import os
+import shutil
+import tempfile
+
+from raster import page_output_path
+
+
+class OutputSpool:
+    """Pasta temporária com os resultados das conversões ainda não salvos."""
+
+    def __init__(self, root=None):
+        self.directory = tempfile.mkdtemp(prefix='conversor_', dir=root)
+
+    def new_output(self, fmt):
+        """Caminho de saída para uma conversão, numa subpasta própria."""
+        return os.path.join(tempfile.mkdtemp(dir=self.directory), f"resultado.{fmt}")
+
+    def discard(self, output_path):
+        """Apaga o que restou de uma conversão (resultado não salvo, cancelado ou com erro)."""
+        folder = os.path.dirname(os.path.abspath(output_path))
+        if os.path.dirname(folder) == os.path.abspath(self.directory):
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _move(source, target):
+    try:
+        # Mesmo disco: rename atômico, sem copiar nada
+        os.replace(source, target)
+        return
+    except OSError:
+        # Outro disco (ou, no Windows, o arquivo ainda aberto na visualização)
+        pass
+    temp_path = f"{target}.tmp{os.getpid()}"
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_output(paths, destination):
+    """
+    Move os arquivos de um resultado para `destination` e devolve os caminhos gravados.
+    Um resultado de várias páginas JPG vira <nome>_pagina_N.jpg ao lado do destino.
+    """
+    if len(paths) == 1:
+        targets = [destination]
+    else:
+        targets = [page_output_path(destination, number) for number in range(1, len(paths) + 1)]
+    for source, target in zip(paths, targets):
+        _move(source, target)
+    return targets
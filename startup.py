@@ -0,0 +1,192 @@
+"""
+Tempo de abertura do aplicativo.
+
+As bibliotecas pesadas (pandas, PyMuPDF, Pillow, reportlab, requests) não são
+importadas quando o programa abre: cada módulo as importa dentro da função
+que as usa. Assim a janela aparece assim que o customtkinter carrega, e a
+primeira conversão paga o custo só do que ela precisa.
+
+Para que essa primeira conversão também não espere, prewarm() importa as
+bibliotecas numa thread em segundo plano logo depois que a janela aparece.
+
+Executado diretamente, mede o tempo de importação de cada módulo em
+processos novos (python -X importtime) e imprime um JSON; com --base
+compara com uma medição anterior e falha se algum módulo ficou mais lento:
+
+    python startup.py --saida base.json
+    python startup.py --base base.json
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+
+# Na ordem em que costumam ser necessários: extratos primeiro, depois PDF e imagens
+PREWARM_MODULES = (
+    'pandas',
+    'ofx_writer',
+    'report',
+    'fitz',
+    'PIL.Image',
+    'preview',
+)
+
+# Módulos medidos pelo benchmark (o 'main' é o que a abertura do aplicativo paga)
+BENCHMARK_MODULES = ('main', 'converter', 'batch', 'pandas', 'fitz', 'PIL.Image', 'reportlab.pdfbase.pdfmetrics', 'requests')
+BENCHMARK_RUNS = 3
+# Uma regressão precisa passar da tolerância relativa e também deste mínimo absoluto
+REGRESSION_TOLERANCE = 0.25
+REGRESSION_MIN_MS = 20.0
+# Quantas dependências diretas aparecem no detalhamento de cada módulo
+TOP_IMPORTS = 8
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def prewarm(modules=PREWARM_MODULES):
+    """
+    Importa `modules` numa thread de segundo plano e devolve a thread.
+
+    Erros são ignorados: se uma biblioteca faltar, a conversão que precisar
+    dela vai mostrar o erro normalmente.
+    """
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def parse_importtime(output):
+    """
+    Lê a saída de -X importtime: [(módulo, acumulado_ms, nível)], na ordem da saída.
+
+    O nível é a indentação do nome (1 = importado diretamente pelo comando);
+    as dependências de um módulo aparecem logo antes dele, um nível abaixo.
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        try:
+            cumulative_ms = int(cumulative_us) / 1000
+        except ValueError:
+            # Linha de cabeçalho
+            continue
+        level = (len(name) - len(name.lstrip(' '))) // 2
+        timings.append((name.strip(), cumulative_ms, level))
+    return timings
+
+
+def _find_import(timings, module):
+    """(acumulado_ms, {dependência direta: ms}) de `module`, ou None se ele não foi importado."""
+    for i, (name, cumulative, level) in enumerate(timings):
+        if name != module:
+            continue
+        children = {}
+        for child, child_ms, child_level in reversed(timings[:i]):
+            if child_level <= level:
+                break
+            if child_level == level + 1:
+                children[child] = child_ms
+        return cumulative, children
+    return None
+
+
+def measure_import(module, runs=BENCHMARK_RUNS, python=sys.executable):
+    """
+    Tempo de `import module` num interpretador novo (o menor de `runs` tentativas).
+
+    Devolve {'ms': acumulado, 'principais': {dependência: ms}} ou None se o
+    módulo não puder ser importado neste ambiente.
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([python, '-X', 'importtime', '-c', f"import {module}"], cwd=ROOT,
+                                capture_output=True, text=True, encoding='utf-8', errors='replace')
+        if result.returncode != 0:
+            return None
+        found = _find_import(parse_importtime(result.stderr), module)
+        if found is None:
+            return None
+        if best is None or found[0] < best[0]:
+            best = found
+
+    cumulative, children = best
+    top = sorted(children.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    return {
+        'ms': round(cumulative, 1),
+        'principais': {name: round(ms, 1) for name, ms in top},
+    }
+
+
+def run_benchmark(modules=BENCHMARK_MODULES, runs=BENCHMARK_RUNS):
+    results = {}
+    for module in modules:
+        results[module] = measure_import(module, runs)
+    return {
+        'python': sys.version.split()[0],
+        'plataforma': sys.platform,
+        'execucoes': runs,
+        'modulos': results,
+    }
+
+
+def find_regressions(current, base, tolerance=REGRESSION_TOLERANCE, min_ms=REGRESSION_MIN_MS):
+    """Módulos que ficaram mais lentos que na medição `base`: [(módulo, antes_ms, agora_ms)]."""
+    regressions = []
+    for module, now in current['modulos'].items():
+        before = base.get('modulos', {}).get(module)
+        if not now or not before:
+            continue
+        if now['ms'] > before['ms'] * (1 + tolerance) and now['ms'] - before['ms'] > min_ms:
+            regressions.append((module, before['ms'], now['ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos módulos do aplicativo.")
+    parser.add_argument('modulos', nargs='*', help=f"Módulos a medir (padrão: {', '.join(BENCHMARK_MODULES)}).")
+    parser.add_argument('--execucoes', type=int, default=BENCHMARK_RUNS, help="Medições por módulo; vale a menor (padrão: %(default)s).")
+    parser.add_argument('--saida', metavar='ARQUIVO_JSON', help="Grava o resultado neste arquivo, além de imprimir.")
+    parser.add_argument('--base', metavar='ARQUIVO_JSON', help="Medição anterior: falha se algum módulo ficou mais lento.")
+    parser.add_argument('--tolerancia', type=float, default=REGRESSION_TOLERANCE,
+                        help="Aumento relativo aceito em relação à base (padrão: %(default)s).")
+    args = parser.parse_args(argv)
+    if args.execucoes < 1:
+        parser.error("--execucoes precisa ser pelo menos 1.")
+
+    base = None
+    if args.base:
+        try:
+            with open(args.base, encoding='utf-8') as f:
+                base = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            parser.error(f"não foi possível ler a base '{args.base}' ({e}).")
+
+    summary = run_benchmark(tuple(args.modulos) or BENCHMARK_MODULES, args.execucoes)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+    if base is not None:
+        regressions = find_regressions(summary, base, args.tolerancia)
+        for module, before, now in regressions:
+            print(f"Regressão: import {module} passou de {before} ms para {now} ms.", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
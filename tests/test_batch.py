@@ -0,0 +1,30 @@
+import batch
+from test_conversions import OFX
+
+
+def _statement(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(OFX, encoding='cp1252')
+    return str(path)
+
+
+def test_same_name_in_different_folders_is_refused(tmp_path):
+    first = _statement(tmp_path / "2023" / "jan.ofx")
+    second = _statement(tmp_path / "2024" / "jan.ofx")
+    other = _statement(tmp_path / "2024" / "fev.ofx")
+    output_dir = tmp_path / "saida"
+    summary = batch.run_batch([first, second, other], 'ofx', 'csv', str(output_dir), workers=1)
+    status = {result['input']: result['status'] for result in summary['results']}
+    assert status == {first: 'error', second: 'error', other: 'converted'}
+    assert sorted(p.name for p in output_dir.iterdir()) == ['fev.csv']
+    # Numa nova execução o conflito continua sendo apontado, não vira "em dia"
+    summary = batch.run_batch([first, second, other], 'ofx', 'csv', str(output_dir), workers=1)
+    assert (summary['errors'], summary['skipped']) == (2, 1)
+
+
+def test_same_name_without_output_dir(tmp_path):
+    first = _statement(tmp_path / "2023" / "jan.ofx")
+    second = _statement(tmp_path / "2024" / "jan.ofx")
+    summary = batch.run_batch([first, second], 'ofx', 'csv', workers=1)
+    assert summary['converted'] == 2
+    assert (tmp_path / "2023" / "jan.csv").exists() and (tmp_path / "2024" / "jan.csv").exists()
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import cache
+from cache import ConversionCache
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    calls = []
+    digest = cache.input_digest
+
+    def counted(input_path):
+        calls.append(input_path)
+        return digest(input_path)
+
+    monkeypatch.setattr(cache, 'input_digest', counted)
+    return calls
+
+
+def _convert_into(output_path, text, runs):
+    def convert():
+        runs.append(output_path)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return [output_path]
+    return convert
+
+
+def test_unchanged_input_is_not_hashed_again(tmp_path, hashes):
+    source = tmp_path / "extrato.ofx"
+    source.write_text("conteúdo", encoding='utf-8')
+    runs = []
+    for session in range(3):
+        # Um ConversionCache novo a cada vez, como ao reabrir o programa
+        conversion_cache = ConversionCache(str(tmp_path / "cache"))
+        output = str(tmp_path / f"saida{session}.csv")
+        paths = conversion_cache.get_or_convert_file("ofx_to_csv", str(source), {}, output, _convert_into(output, "csv", runs))
+        assert paths == [output]
+        assert open(output, encoding='utf-8').read() == "csv"
+    assert len(runs) == 1
+    assert len(hashes) == 1
+
+
+def test_changed_input_is_hashed_and_converted_again(tmp_path, hashes):
+    source = tmp_path / "extrato.ofx"
+    source.write_text("versão 1", encoding='utf-8')
+    conversion_cache = ConversionCache(str(tmp_path / "cache"))
+    runs = []
+    first = conversion_cache.get_or_convert("ofx_to_csv", str(source), {}, lambda: runs.append(1) or "um")
+    source.write_text("versão 2", encoding='utf-8')
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = conversion_cache.get_or_convert("ofx_to_csv", str(source), {}, lambda: runs.append(2) or "dois")
+    assert (first, second, runs) == ("um", "dois", [1, 2])
+    assert len(hashes) == 2
+
+
+def test_copy_of_converted_file_hits_by_content(tmp_path, hashes):
+    conversion_cache = ConversionCache(str(tmp_path / "cache"))
+    original = tmp_path / "extrato.ofx"
+    original.write_text("conteúdo", encoding='utf-8')
+    copy = tmp_path / "copia.ofx"
+    copy.write_text("conteúdo", encoding='utf-8')
+    runs = []
+    assert conversion_cache.get_or_convert("ofx_to_csv", str(original), {}, lambda: runs.append(1) or "csv") == "csv"
+    assert conversion_cache.get_or_convert("ofx_to_csv", str(copy), {}, lambda: runs.append(2) or "outro") == "csv"
+    assert runs == [1]
+    assert len(hashes) == 2
+
+
+def test_clear_removes_the_index(tmp_path):
+    conversion_cache = ConversionCache(str(tmp_path / "cache"))
+    source = tmp_path / "extrato.ofx"
+    source.write_text("conteúdo", encoding='utf-8')
+    conversion_cache.get_or_convert("ofx_to_csv", str(source), {}, lambda: "csv")
+    conversion_cache.clear()
+    assert conversion_cache._entries() == []
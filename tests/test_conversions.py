@@ -0,0 +1,72 @@
+import hashlib
+
+import pytest
+
+import batch
+from converter import Converter
+from conversions import can_convert, plan_route, supported_targets
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+ENCODING:USASCII
+CHARSET:1252
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>BRL
+<BANKACCTFROM><BANKID>341<ACCTID>98765</BANKACCTFROM>
+<BANKTRANLIST><DTSTART>20230101<DTEND>20230131
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20230105<TRNAMT>-12.34<FITID>A1<MEMO>Padaria</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20230106<TRNAMT>1500.00<FITID>A2<MEMO>Salário</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture
+def ofx_path(tmp_path):
+    path = tmp_path / "extrato.ofx"
+    path.write_text(OFX, encoding='cp1252')
+    return path
+
+
+def _md5(path):
+    return hashlib.md5(path.read_bytes()).hexdigest()
+
+
+@pytest.mark.parametrize('fmt', ['ofx', 'csv', 'xml', 'pdf', 'jpg'])
+def test_same_format_is_not_a_conversion(fmt):
+    with pytest.raises(NotImplementedError):
+        plan_route(fmt, fmt)
+    assert not can_convert(fmt, fmt)
+    assert fmt not in supported_targets(fmt)
+
+
+def test_routes_between_formats():
+    assert supported_targets('ofx') == ['csv', 'pdf', 'xml']
+    assert supported_targets('csv') == ['ofx', 'pdf', 'xml']
+    assert plan_route('csv', 'ofx').describe() == "csv -> tabela -> transacoes -> ofx"
+    assert plan_route('ofx', 'csv').describe() == "ofx -> transacoes -> csv"
+    with pytest.raises(NotImplementedError):
+        plan_route('jpg', 'csv')
+
+
+def test_ofx_to_csv_keeps_values(ofx_path, tmp_path):
+    output = tmp_path / "extrato.csv"
+    Converter().convert(str(ofx_path), 'ofx', 'csv', str(output))
+    lines = output.read_text(encoding='utf-8-sig').splitlines()
+    assert lines == ['data;descricao;valor;id', '2023-01-05;Padaria;-12.34;A1', '2023-01-06;Salário;1500.00;A2']
+
+
+def test_batch_refuses_same_format(ofx_path):
+    before = _md5(ofx_path)
+    with pytest.raises(NotImplementedError):
+        batch.run_batch([str(ofx_path)], 'ofx', 'ofx', force=True)
+    assert _md5(ofx_path) == before
+
+
+def test_batch_never_overwrites_input(ofx_path, monkeypatch):
+    # Uma saída que resolve para a entrada (ex.: link ou outra caixa) vira erro, mesmo com --forcar
+    monkeypatch.setattr(batch, 'output_path_for', lambda input_path, to_format, output_dir=None: input_path)
+    before = _md5(ofx_path)
+    summary = batch.run_batch([str(ofx_path)], 'ofx', 'csv', force=True)
+    assert summary['errors'] == 1 and summary['converted'] == 0
+    assert _md5(ofx_path) == before
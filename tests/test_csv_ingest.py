@@ -0,0 +1,113 @@
+import importlib.util
+import re
+from datetime import date, timedelta
+
+import pytest
+
+import csv_ingest
+from converter import Converter
+from csv_ingest import iter_csv_chunks, sniff_csv
+
+READERS = [
+    pytest.param(True, id='pyarrow', marks=pytest.mark.skipif(importlib.util.find_spec('pyarrow') is None,
+                                                                reason="pyarrow não instalado")),
+    pytest.param(False, id='pandas'),
+]
+
+
+def _write(tmp_path, text, name="entrada.csv", encoding='utf-8'):
+    path = tmp_path / name
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+def _ofx_amounts(input_path, tmp_path):
+    output = tmp_path / "saida.ofx"
+    Converter().convert(input_path, 'csv', 'ofx', str(output))
+    return re.findall(r'<TRNAMT>([^<]+)</TRNAMT>', output.read_text(encoding='utf-8'))
+
+
+@pytest.mark.parametrize('text, sep, decimal', [
+    ("data;descricao;valor\n05/01/2023;Padaria;-12,34\n", ';', ','),
+    ("data,descricao,valor\n05/01/2023,Padaria,-12.34\n", ',', '.'),
+    ("data\tdescricao\tvalor\n05/01/2023\tPadaria\t-12.34\n", '\t', '.'),
+    ("data;descricao;valor\n05/01/2023;Padaria;-12.34\n", ';', '.'),
+    # Sem casas decimais na amostra: vírgula, a não ser que ela separe as colunas
+    ("data;descricao;valor\n05/01/2023;Padaria;1.000\n", ';', ','),
+    ("data,descricao,valor\n05/01/2023,Padaria,1000\n", ',', '.'),
+])
+def test_sniff_separators(tmp_path, text, sep, decimal):
+    dialect = sniff_csv(_write(tmp_path, text))
+    assert (dialect.sep, dialect.decimal, dialect.date_format) == (sep, decimal, '%d/%m/%Y')
+    assert dialect.columns == ['data', 'descricao', 'valor']
+
+
+def test_comma_delimited_with_dot_decimals(tmp_path):
+    path = _write(tmp_path, "data,descricao,valor\n05/01/2023,Padaria,10.50\n06/01/2023,Aluguel,-1500.5\n07/01/2023,PIX,3\n")
+    assert _ofx_amounts(path, tmp_path) == ['10.50', '-1500.50', '3.00']
+
+
+def test_semicolon_with_comma_decimals_and_thousands(tmp_path):
+    path = _write(tmp_path, "data;descricao;valor\n05/01/2023;Padaria;R$ 1.234,56\n06/01/2023;Tarifa;-10,5\n", encoding='latin-1')
+    assert _ofx_amounts(path, tmp_path) == ['1234.56', '-10.50']
+
+
+@pytest.mark.parametrize('use_pyarrow', READERS)
+def test_missing_trailing_columns_are_empty(tmp_path, monkeypatch, use_pyarrow):
+    monkeypatch.setattr(csv_ingest, 'HAS_PYARROW', use_pyarrow)
+    path = _write(tmp_path, "data;descricao;valor;id\n05/01/2023;Padaria;-12,34;A1\n06/01/2023;Aluguel;10,00\n")
+    (chunk,) = iter_csv_chunks(path)
+    assert list(chunk.index) == [0, 1]
+    assert chunk['valor'].tolist() == ['-12,34', '10,00']
+    assert chunk['id'].isna().tolist() == [False, True]
+    assert _ofx_amounts(path, tmp_path) == ['-12.34', '10.00']
+
+
+@pytest.mark.parametrize('use_pyarrow', READERS)
+def test_ragged_row_after_the_first_block(tmp_path, monkeypatch, use_pyarrow):
+    monkeypatch.setattr(csv_ingest, 'HAS_PYARROW', use_pyarrow)
+    rows = [f"05/01/2023;Item {i};{i},00" + ("" if i == 40000 else f";ID{i}") for i in range(50000)]
+    path = _write(tmp_path, "data;descricao;valor;id\n" + "\n".join(rows) + "\n")
+    chunks = list(iter_csv_chunks(path, memory_budget=1024 * 1024))
+    assert len(chunks) > 1
+    index = [i for chunk in chunks for i in chunk.index]
+    assert index == list(range(50000))
+    descriptions = [d for chunk in chunks for d in chunk['descricao']]
+    assert descriptions == [f"Item {i}" for i in range(50000)]
+
+
+@pytest.mark.parametrize('use_pyarrow', READERS)
+def test_extra_columns_name_the_line(tmp_path, monkeypatch, use_pyarrow):
+    monkeypatch.setattr(csv_ingest, 'HAS_PYARROW', use_pyarrow)
+    path = _write(tmp_path, "data;descricao;valor\n05/01/2023;Padaria;-12,34\n06/01/2023;Aluguel;10,00;extra\n")
+    with pytest.raises(ValueError, match="linha 3 do CSV tem 4 colunas"):
+        list(iter_csv_chunks(path))
+
+
+@pytest.mark.parametrize('dates, date_format', [
+    (['2020-01-01', '2020-01-13'], '%Y-%m-%d'),
+    (['01/02/2020', '13/02/2020'], '%d/%m/%Y'),
+    (['01/02/20', '13/02/20'], '%d/%m/%y'),
+    (['01/02/2020', '2020-02-13'], None),
+])
+def test_sniff_date_format(tmp_path, dates, date_format):
+    text = "data;descricao;valor\n" + "".join(f"{day};Item;1,00\n" for day in dates)
+    assert sniff_csv(_write(tmp_path, text)).date_format == date_format
+
+
+@pytest.mark.parametrize('use_pyarrow', READERS)
+def test_iso_dates_do_not_depend_on_the_chunks(tmp_path, monkeypatch, use_pyarrow):
+    # Cada bloco começa num dia diferente; "2020-01-01" sozinho não diz se o mês vem antes do dia
+    monkeypatch.setattr(csv_ingest, 'HAS_PYARROW', use_pyarrow)
+    start = date(2020, 1, 1)
+    days = [start + timedelta(days=i // 200) for i in range(60000)]
+    path = _write(tmp_path, "data;descricao;valor;id\n" + "".join(f"{day.isoformat()};Item {i};{i}.50;ID{i}\n"
+                                                                 for i, day in enumerate(days)))
+    assert len(list(iter_csv_chunks(path, memory_budget=1024 * 1024))) > 1
+
+    converter = Converter()
+    converter.csv_chunk_bytes = 1024 * 1024
+    output = tmp_path / "saida.ofx"
+    converter.convert(path, 'csv', 'ofx', str(output))
+    posted = re.findall(r'<DTPOSTED>(\d{8})', output.read_text(encoding='utf-8'))
+    assert posted == [f"{day:%Y%m%d}" for day in days]
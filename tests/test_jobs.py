@@ -0,0 +1,52 @@
+import threading
+import time
+
+from jobs import CANCELLED, DONE, JobManager, cancel_and_wait
+
+
+class _Widget:
+    """Substitui a janela do Tk: o polling da fila não é necessário aqui."""
+
+    def after(self, ms, callback):
+        pass
+
+
+def test_submit_runs_work():
+    manager = JobManager(_Widget(), max_workers=1)
+    job = manager.submit("soma", lambda report: 1 + 1)
+    job._future.result(timeout=5)
+    assert (job.status, job.result) == (DONE, 2)
+    manager.shutdown()
+
+
+def test_submit_after_shutdown_is_a_noop():
+    manager = JobManager(_Widget(), max_workers=1)
+    manager.shutdown()
+    calls = []
+    job = manager.submit("fechar", lambda report: calls.append(1))
+    assert job.status == CANCELLED and job.finished
+    assert calls == [] and manager.active_jobs() == []
+
+
+def test_cancel_and_wait_returns_after_running_job_gives_up():
+    manager = JobManager(_Widget(), max_workers=1)
+    started = threading.Event()
+    finished = []
+
+    def work(report):
+        started.set()
+        try:
+            while True:
+                report(0, 1)
+                time.sleep(0.01)
+        finally:
+            finished.append(True)
+
+    running = manager.submit("busca", work)
+    queued = manager.submit("página", lambda report: finished.append(False))
+    assert started.wait(5)
+    cancel_and_wait([running, queued])
+    assert (running.status, queued.status) == (CANCELLED, CANCELLED)
+    # A tarefa na fila nem chegou a rodar
+    assert finished == [True]
+    manager.shutdown()
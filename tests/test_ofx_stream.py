@@ -0,0 +1,125 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import ofx_stream
+from ofx_stream import SNIFF_SIZE, iter_ofx_transactions, parse_ofx_amount, parse_ofx_datetime
+
+SGML_HEADER = ("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\n"
+               "COMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n")
+XML_HEADER = ('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+              '<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>\n')
+
+
+def _sgml(transactions, statement='STMTRS', header=SGML_HEADER):
+    return (header + f"<OFX><BANKMSGSRSV1><STMTTRNRS><{statement}><CURDEF>BRL\n<BANKTRANLIST>"
+            "<DTSTART>20230101<DTEND>20230131\n" + transactions
+            + f"</BANKTRANLIST></{statement}></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def _read(data, encoding='cp1252'):
+    raw = data.encode(encoding) if isinstance(data, str) else data
+    return list(iter_ofx_transactions(io.BytesIO(raw)))
+
+
+def test_sgml_without_closing_tags():
+    transactions = _read(_sgml(
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20230105<TRNAMT>-12.34<FITID>A1<MEMO>Padaria &amp; Cia<NAME>Fulano\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20230106<TRNAMT>1500.00<FITID>A2<MEMO>Salário\n"))
+    assert [(t.date, t.memo, t.amount, t.id, t.type, t.payee) for t in transactions] == [
+        (datetime(2023, 1, 5), 'Padaria & Cia', Decimal('-12.34'), 'A1', 'debit', 'Fulano'),
+        (datetime(2023, 1, 6), 'Salário', Decimal('1500.00'), 'A2', 'credit', ''),
+    ]
+
+
+def test_xml_ofx():
+    data = (XML_HEADER + "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>BRL</CURDEF><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20230105120000</DTPOSTED><TRNAMT>-12.34</TRNAMT>"
+            "<FITID>A1</FITID><MEMO>Loja &lt;matriz&gt;</MEMO></STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20230106</DTPOSTED><TRNAMT>5</TRNAMT>"
+            "<FITID>A2</FITID><MEMO/></STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    transactions = _read(data, 'utf-8')
+    assert [(t.date, t.memo, t.amount, t.id) for t in transactions] == [
+        (datetime(2023, 1, 5, 12), 'Loja <matriz>', Decimal('-12.34'), 'A1'),
+        (datetime(2023, 1, 6), '', Decimal('5'), 'A2'),
+    ]
+
+
+def test_credit_card_statement():
+    transactions = _read(_sgml("<STMTTRN><DTPOSTED>20230105<TRNAMT>-99.90<FITID>C1<MEMO>Mercado</STMTTRN>\n",
+                               statement='CCSTMTRS'))
+    assert [(t.memo, t.amount, t.id) for t in transactions] == [('Mercado', Decimal('-99.90'), 'C1')]
+
+
+def test_missing_statement_is_an_error():
+    with pytest.raises(ValueError, match="nenhum extrato"):
+        _read(SGML_HEADER + "<OFX><SIGNONMSGSRSV1></SIGNONMSGSRSV1></OFX>\n")
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 13, 64])
+def test_tags_split_across_reads(monkeypatch, chunk_size):
+    data = _sgml("".join(f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>2023010{i + 1}<TRNAMT>-{i}.50<FITID>ID{i}"
+                         f"<MEMO>Compra número {i}</STMTTRN>\n" for i in range(5)))
+    expected = _read(data)
+    monkeypatch.setattr(ofx_stream, 'CHUNK_SIZE', chunk_size)
+    assert _read(data) == expected
+    assert [t.memo for t in expected] == [f"Compra número {i}" for i in range(5)]
+
+
+def test_latin1_bytes_after_the_sniff_window():
+    # O começo é ASCII puro e o cabeçalho declara UTF-8: o prefixo não denuncia o encoding real
+    filler = "".join(f"<STMTTRN><DTPOSTED>20230105<TRNAMT>-1.00<FITID>F{i}<MEMO>Tarifa\n" for i in range(SNIFF_SIZE // 50))
+    late = "<STMTTRN><DTPOSTED>20230106<TRNAMT>-2.00<FITID>LATE<MEMO>Serviço Água\n"
+    data = _sgml(filler + late, header=SGML_HEADER.replace("ENCODING:USASCII", "ENCODING:UTF-8")).encode('latin-1')
+    assert data.index("Serviço".encode('latin-1')) > SNIFF_SIZE
+    transactions = _read(data)
+    assert transactions[-1].id == 'LATE'
+    assert transactions[-1].memo == "Serviço Água"
+
+
+def test_cdata_memo():
+    transactions = _read(_sgml("<STMTTRN><DTPOSTED>20230105<TRNAMT>-1.00<FITID>A1"
+                               "<MEMO><![CDATA[Loja <A> & B]]></MEMO></STMTTRN>\n"
+                               "<STMTTRN><DTPOSTED>20230106<TRNAMT>2.00<FITID>A2<MEMO>Antes <![CDATA[&amp;]]> depois\n"))
+    assert [t.memo for t in transactions] == ['Loja <A> & B', 'Antes &amp; depois']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 11])
+def test_cdata_split_across_reads(monkeypatch, chunk_size):
+    monkeypatch.setattr(ofx_stream, 'CHUNK_SIZE', chunk_size)
+    transactions = _read(_sgml("<STMTTRN><DTPOSTED>20230105<TRNAMT>-1.00<FITID>A1"
+                               "<MEMO><![CDATA[a<b>c]]></MEMO></STMTTRN>\n"))
+    assert transactions[0].memo == 'a<b>c'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('20230106', datetime(2023, 1, 6)),
+    ('20230106100000', datetime(2023, 1, 6, 10)),
+    # Como o ofxparse: o fuso é descontado (BRT, -3h, vira UTC)
+    ('20230106100000[-3:BRT]', datetime(2023, 1, 6, 13)),
+    ('20230106100000.500[-3:BRT]', datetime(2023, 1, 6, 13, 0, 0, 500000)),
+    ('20230106[+2:EET]', datetime(2023, 1, 5, 22)),
+])
+def test_parse_datetime(value, expected):
+    assert parse_ofx_datetime(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('-12.34', '-12.34'),
+    ('-12,34', '-12.34'),
+    ('+10,5', '10.5'),
+    ('-1.234,56', '-1234.56'),
+    ('1,234.56', '1234.56'),
+    ('1 025,53', '1025.53'),
+    ('null', '0'),
+])
+def test_parse_amount(value, expected):
+    assert parse_ofx_amount(value) == Decimal(expected)
+
+
+def test_comma_decimal_in_a_statement():
+    transactions = _read(_sgml("<STMTTRN><DTPOSTED>20230105[-3:BRT]<TRNAMT>-1.234,56<FITID>A1<MEMO>Aluguel\n"))
+    assert (transactions[0].date, transactions[0].amount) == (datetime(2023, 1, 5, 3), Decimal('-1234.56'))
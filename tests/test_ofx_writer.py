@@ -0,0 +1,58 @@
+import io
+import re
+
+import pandas as pd
+
+from converter import Converter
+from ofx_writer import OfxWriter
+
+
+def _transactions(memos):
+    return pd.DataFrame({
+        'data': pd.to_datetime(['2023-01-05', '2023-01-06', '2023-01-07'][:len(memos)]),
+        'descricao': pd.Series(memos, dtype='string'),
+        'valor': [-12.34, 1500.0, 0.5][:len(memos)],
+    })
+
+
+def _write(df):
+    sink = io.StringIO()
+    writer = OfxWriter(sink)
+    writer.write(df)
+    writer.close()
+    return sink.getvalue()
+
+
+def _tag(text, name):
+    return re.findall(rf'<{name}>([^<]*)</{name}>', text)
+
+
+def test_values_and_header():
+    text = _write(_transactions(['Padaria', 'Salário', 'PIX']))
+    assert _tag(text, 'TRNTYPE') == ['DEBIT', 'CREDIT', 'CREDIT']
+    assert _tag(text, 'TRNAMT') == ['-12.34', '1500.00', '0.50']
+    assert _tag(text, 'FITID') == ['202301050', '202301061', '202301072']
+    assert _tag(text, 'MEMO') == ['Padaria', 'Salário', 'PIX']
+    assert _tag(text, 'DTSTART') == ['20230105000000']
+    assert _tag(text, 'DTEND') == ['20230107000000']
+
+
+def test_memo_is_escaped():
+    text = _write(_transactions(['Loja & Cia <matriz>']))
+    assert _tag(text, 'MEMO') == ['Loja &amp; Cia &lt;matriz&gt;']
+
+
+def test_missing_description_becomes_empty_memo():
+    text = _write(_transactions(['Padaria', pd.NA, None]))
+    assert _tag(text, 'MEMO') == ['Padaria', '', '']
+    assert _tag(text, 'TRNAMT') == ['-12.34', '1500.00', '0.50']
+
+
+def test_csv_with_empty_description(tmp_path):
+    source = tmp_path / "entrada.csv"
+    source.write_text("data;descricao;valor\n05/01/2023;;-12,34\n06/01/2023;NA;10,00\n", encoding='utf-8')
+    output = tmp_path / "saida.ofx"
+    Converter().convert(str(source), 'csv', 'ofx', str(output))
+    text = output.read_text(encoding='utf-8')
+    assert _tag(text, 'MEMO') == ['', '']
+    assert _tag(text, 'TRNAMT') == ['-12.34', '10.00']
@@ -0,0 +1,32 @@
+import io
+
+from PIL import Image
+
+from pdf_assembler import baseline_jpeg_info
+
+
+def _jpeg(mode='RGB', **options):
+    buffer = io.BytesIO()
+    Image.new(mode, (40, 30), 'white' if mode == 'RGB' else 255).save(buffer, 'JPEG', **options)
+    return buffer.getvalue()
+
+
+def test_baseline_jpeg_is_embedded(tmp_path):
+    path = tmp_path / "foto.jpg"
+    path.write_bytes(_jpeg())
+    assert baseline_jpeg_info(str(path)) == (40, 30, 3)
+
+
+def test_progressive_jpeg_is_reencoded(tmp_path):
+    path = tmp_path / "foto.jpg"
+    path.write_bytes(_jpeg(progressive=True))
+    assert baseline_jpeg_info(str(path)) is None
+
+
+def test_truncated_sof_is_reencoded(tmp_path):
+    data = _jpeg('L')
+    sof = data.index(b'\xff\xc0')
+    for size in range(sof + 2, sof + 10):
+        path = tmp_path / f"cortado{size}.jpg"
+        path.write_bytes(data[:size])
+        assert baseline_jpeg_info(str(path)) is None
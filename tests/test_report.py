@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+import fitz
+import pytest
+
+from converter import Converter
+from report import parse_amount
+
+
+@pytest.mark.parametrize('text, decimal, expected', [
+    ('-10.50', None, '-10.50'),
+    ('R$ 1.234,56', None, '1234.56'),
+    ('1,234.56', '.', '1234.56'),
+    ('10.50', '.', '10.50'),
+    ('1.234,56', ',', '1234.56'),
+    ('10,5', ',', '10.5'),
+])
+def test_parse_amount(text, decimal, expected):
+    assert parse_amount(text, decimal) == Decimal(expected)
+
+
+def test_parse_amount_rejects_text():
+    assert parse_amount('abc') is None
+
+
+def _pdf_text(path):
+    with fitz.open(path) as document:
+        return "".join(page.get_text() for page in document)
+
+
+def test_csv_total_uses_detected_decimal(tmp_path):
+    source = tmp_path / "entrada.csv"
+    source.write_text('data,descricao,valor\n05/01/2023,Aluguel,"1,234.56"\n06/01/2023,Padaria,10.50\n', encoding='utf-8')
+    output = tmp_path / "saida.pdf"
+    Converter().convert(str(source), 'csv', 'pdf', str(output))
+    assert "Total: 1245.06" in _pdf_text(output)
+
+
+def test_csv_total_with_comma_decimal(tmp_path):
+    source = tmp_path / "entrada.csv"
+    source.write_text("data;descricao;valor\n05/01/2023;Aluguel;R$ 1.234,56\n06/01/2023;Padaria;-10,50\n", encoding='utf-8')
+    output = tmp_path / "saida.pdf"
+    Converter().convert(str(source), 'csv', 'pdf', str(output))
+    assert "Total: 1224.06" in _pdf_text(output)
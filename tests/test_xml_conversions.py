@@ -0,0 +1,53 @@
+import json
+import re
+
+import pytest
+
+from converter import Converter
+
+BANK_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<Exportacao><Conta><Lancamento><DataMov>05/01/2023</DataMov><Historico>Padaria</Historico><Valor bruto="-12,34"/></Lancamento>
+<Lancamento><DataMov>06/01/2023</DataMov><Historico>Salário</Historico><Valor bruto="1.500,00"/></Lancamento></Conta></Exportacao>
+"""
+MAPPING = {"registro": "//Lancamento", "campos": {"data": "DataMov", "descricao": "Historico", "valor": "Valor/@bruto"},
+           "decimal": ",", "formato_data": "%d/%m/%Y"}
+
+
+@pytest.fixture
+def bank_xml(tmp_path):
+    source = tmp_path / "banco.xml"
+    source.write_text(BANK_XML, encoding='utf-8')
+    mapping = tmp_path / "banco.json"
+    mapping.write_text(json.dumps(MAPPING), encoding='utf-8')
+    return str(source), str(mapping)
+
+
+def test_xml_to_csv_is_normalized(bank_xml, tmp_path):
+    source, mapping = bank_xml
+    output = tmp_path / "saida.csv"
+    Converter().convert(source, 'xml', 'csv', str(output), mapping=mapping)
+    assert output.read_text(encoding='utf-8').splitlines() == [
+        'data;descricao;valor;id', '2023-01-05;Padaria;-12,34;', '2023-01-06;Salário;1500,0;']
+
+
+def test_xml_to_csv_round_trips_to_ofx(bank_xml, tmp_path):
+    source, mapping = bank_xml
+    csv_path, ofx_path, direct_path = (tmp_path / name for name in ("saida.csv", "via_csv.ofx", "direto.ofx"))
+    converter = Converter()
+    converter.convert(source, 'xml', 'csv', str(csv_path), mapping=mapping)
+    converter.convert(str(csv_path), 'csv', 'ofx', str(ofx_path))
+    converter.convert(source, 'xml', 'ofx', str(direct_path), mapping=mapping)
+    amounts = [re.findall(r'<TRNAMT>([^<]+)', path.read_text(encoding='utf-8')) for path in (ofx_path, direct_path)]
+    assert amounts == [['-12.34', '1500.00'], ['-12.34', '1500.00']]
+
+
+@pytest.mark.parametrize('target', ['csv', 'ofx'])
+def test_invalid_amount_is_rejected_for_every_target(bank_xml, tmp_path, target):
+    source, mapping = bank_xml
+    with open(source, 'r+', encoding='utf-8') as f:
+        text = f.read().replace('bruto="-12,34"', 'bruto="doze"')
+        f.seek(0)
+        f.truncate()
+        f.write(text)
+    with pytest.raises(ValueError, match="'valor'"):
+        Converter().convert(source, 'xml', target, str(tmp_path / f"saida.{target}"), mapping=mapping)
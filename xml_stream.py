@@ -0,0 +1,204 @@
+"""
+Leitura e escrita de XML em streaming.
+
+Escrita: cada registro é serializado e enviado ao destino assim que é
+produzido, em vez de montar uma árvore do ElementTree com o extrato inteiro.
+A saída é a mesma do ElementTree.write(encoding='utf-8', xml_declaration=True).
+
+Leitura: um mapeamento declarativo (XmlMapping) diz onde estão os registros
+e, dentro de cada um, onde está cada campo. O arquivo é lido com iterparse e
+cada elemento é descartado assim que termina, então XMLs de vários GB são
+lidos com memória constante.
+"""
+import io
+import json
+import xml.etree.ElementTree as ET
+
+from csv_ingest import describe_rows
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+# Texto acumulado antes de cada escrita no destino
+FLUSH_CHARS = 64 * 1024
+
+
+def escape_text(text):
+    """Escapa o conteúdo de um elemento (mesmas regras do ElementTree)."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+class XmlRecordWriter:
+    """
+    Escreve <raiz><registro><campo>texto</campo>...</registro>...</raiz>.
+
+    O destino pode ser binário (recebe UTF-8) ou de texto (ex.: StringIO).
+    """
+
+    def __init__(self, sink, root):
+        self.sink = sink
+        self.root = root
+        self.record_count = 0
+        self._binary = not isinstance(sink, io.TextIOBase)
+        self._parts = [XML_DECLARATION]
+        self._size = len(XML_DECLARATION)
+
+    def _append(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= FLUSH_CHARS:
+            self.flush()
+
+    def flush(self):
+        data = "".join(self._parts)
+        self.sink.write(data.encode('utf-8') if self._binary else data)
+        self._parts = []
+        self._size = 0
+
+    def write_record(self, tag, fields):
+        """`fields` é uma sequência de (nome, texto); texto vazio ou None vira <nome />."""
+        parts = [f"<{self.root}><{tag}>" if self.record_count == 0 else f"<{tag}>"]
+        for name, text in fields:
+            if text:
+                parts.append(f"<{name}>{escape_text(text)}</{name}>")
+            else:
+                parts.append(f"<{name} />")
+        parts.append(f"</{tag}>")
+        self.record_count += 1
+        self._append("".join(parts))
+
+    def close(self):
+        self._append(f"</{self.root}>" if self.record_count else f"<{self.root} />")
+        self.flush()
+
+
+# --- Leitura com mapeamento ---
+
+def _local_name(tag):
+    """'{http://ns}Transacao' -> 'Transacao' (os caminhos ignoram namespaces)."""
+    return tag.rsplit('}', 1)[-1] if tag[:1] == '{' else tag
+
+
+def _parse_field_path(path):
+    """'Conta/Saldo/@moeda' -> (['Conta', 'Saldo'], 'moeda'); '.' é o próprio registro."""
+    steps = [step for step in path.strip().split('/') if step and step != '.']
+    attribute = None
+    if steps and steps[-1].startswith('@'):
+        attribute = steps.pop()[1:]
+    if not attribute and not steps and path.strip() not in ('.', ''):
+        raise ValueError(f"Caminho de campo inválido no mapeamento XML: '{path}'.")
+    return steps, attribute
+
+
+class XmlMapping:
+    """
+    Onde estão os registros e os campos de um XML.
+
+    `record` é o caminho do elemento de cada registro a partir da raiz
+    ('ExtratoOFX/Transacao') ou, começando com '//', em qualquer nível
+    ('//Transacao'). `fields` liga o nome de cada coluna a um caminho
+    relativo ao registro: 'Valor', 'Conta/Numero', '@tipo' ou 'Conta/@id'.
+    `decimal` é o separador decimal dos valores e `date_format` o formato das
+    datas (None tenta reconhecer, com o dia primeiro).
+    """
+
+    def __init__(self, record, fields, decimal='.', date_format=None):
+        if not record or not fields:
+            raise ValueError("Erro: o mapeamento XML precisa do caminho do registro e de pelo menos um campo.")
+        if decimal not in ('.', ','):
+            raise ValueError(f"Erro: separador decimal inválido no mapeamento XML: '{decimal}'.")
+        self.record = record
+        self.fields = dict(fields)
+        self.decimal = decimal
+        self.date_format = date_format
+        self.columns = list(self.fields)
+        self._anywhere = record.startswith('//')
+        self._record_steps = [step for step in record.split('/') if step]
+        self._field_paths = [_parse_field_path(path) for path in self.fields.values()]
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Lê um mapeamento de um arquivo JSON:
+        {"registro": "//Lancamento", "campos": {"data": "DataMov", "valor": "Valor/@bruto"},
+         "decimal": ",", "formato_data": "%d/%m/%Y"}
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                spec = json.load(f)
+            return cls(spec['registro'], spec['campos'], spec.get('decimal', '.'), spec.get('formato_data'))
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Erro: não foi possível ler o mapeamento XML '{path}' ({e}).")
+
+    def matches(self, tags):
+        """Diz se a pilha de elementos abertos (nomes locais, da raiz até o atual) é um registro."""
+        steps = self._record_steps
+        if self._anywhere:
+            return len(tags) >= len(steps) and tags[-len(steps):] == steps
+        return tags == steps
+
+    def extract(self, record):
+        """Valores dos campos de um elemento de registro, na ordem de `columns`."""
+        values = []
+        for steps, attribute in self._field_paths:
+            element = record
+            for step in steps:
+                element = next((child for child in element if _local_name(child.tag) == step), None)
+                if element is None:
+                    break
+            if element is None:
+                values.append('')
+            elif attribute:
+                value = element.get(attribute)
+                if value is None:
+                    value = next((v for k, v in element.attrib.items() if _local_name(k) == attribute), '')
+                values.append(value.strip())
+            else:
+                values.append((element.text or '').strip())
+        return values
+
+
+# Formato gerado por ofx_to_xml
+OFX_XML_MAPPING = XmlMapping('ExtratoOFX/Transacao', {'data': 'Data', 'descricao': 'Descricao', 'valor': 'Valor', 'id': 'ID'},
+                             decimal='.', date_format='%Y-%m-%d')
+
+
+def describe_records(index):
+    """Como describe_rows, mas numerando os registros do XML a partir de 1."""
+    return describe_rows(index, offset=1, noun="registro")
+
+
+def iter_xml_records(source, mapping):
+    """
+    Gera os valores de cada registro (listas na ordem de mapping.columns).
+
+    Os elementos já lidos são removidos da árvore à medida que terminam;
+    só os registros em andamento e seus ancestrais ficam em memória.
+    """
+    tags = []
+    elements = []
+    record_depth = 0
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                tags.append(_local_name(element.tag))
+                elements.append(element)
+                if not record_depth and mapping.matches(tags):
+                    record_depth = len(tags)
+                continue
+
+            depth = len(tags)
+            if depth == record_depth:
+                record_depth = 0
+                yield mapping.extract(element)
+            tags.pop()
+            elements.pop()
+            # Fora de um registro (ou no fim dele) o elemento não é mais necessário
+            if not record_depth and elements:
+                elements[-1].remove(element)
+    except ET.ParseError as e:
+        raise ValueError(f"Erro: o arquivo não é um XML válido ({e}).")